@@ -0,0 +1,206 @@
+import argparse
+import itertools
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+PLATFORMS = ['Netflix', 'Hulu', 'Prime Video', 'Disney+']
+# Age ratings in increasing order, with the minimum age each one stands for
+AGE_RATINGS = {'all': 0, '7+': 7, '13+': 13, '16+': 16, '18+': 18}
+# Metric name -> column of the parsed frame; a new metric only needs a numeric column and an entry here
+METRICS = {'age rating': 'age', 'score': 'score', 'year': 'year'}
+CORRECTIONS = ['holm', 'bonferroni', 'fdr_bh']
+ALTERNATIVES = ['two-sided', 'less', 'greater']
+# Resampled count vectors generated at once (resamples x distinct values) in permutation/bootstrap tests
+RESAMPLE_BLOCK = 4_000_000
+
+
+def load_movies(path='MoviesOnStreamingPlatforms.csv', platforms=PLATFORMS):
+    """
+    Parses the streaming-platform dataset once into typed columns: title, year (int16),
+    age_rating (ordered categorical), age (float32 minimum age, NaN when unrated),
+    score (float32 Rotten Tomatoes score out of 100, NaN when missing) and one bool per platform.
+    """
+    raw = pd.read_csv(path, usecols=['Title', 'Year', 'Age', 'Rotten Tomatoes', *platforms],
+                      dtype={'Year': np.int16, **{p: np.int8 for p in platforms}})
+    age_rating = pd.Categorical(raw['Age'], categories=list(AGE_RATINGS), ordered=True)
+    ages = np.array([*AGE_RATINGS.values(), np.nan], dtype=np.float32)
+    movies = pd.DataFrame({
+        'title': raw['Title'],
+        'year': raw['Year'],
+        'age_rating': age_rating,
+        'age': ages[age_rating.codes], # code -1 (unrated) picks the trailing NaN
+        'score': pd.to_numeric(raw['Rotten Tomatoes'].str.split('/', n=1).str[0], errors='coerce').astype(np.float32),
+    })
+    for platform in platforms:
+        movies[platform] = raw[platform].astype(bool)
+    return movies
+
+
+def compare_platforms(movies, platforms=PLATFORMS, metrics=METRICS, alternative='two-sided', correction='holm',
+                      permutations=0, bootstrap=0, confidence=0.95, n_jobs=1, seed=42):
+    """
+    Tests every platform pair x metric in one batch and returns one row per test.
+    Welch's t-test runs vectorized over all pairs from per-platform moments; Mann-Whitney U
+    (with the rank-biserial effect size) runs per pair. With permutations > 0 a permutation
+    test of the mean difference is added, with bootstrap > 0 a bootstrap confidence interval
+    for it; those resampling tasks are spread over n_jobs processes.
+    alternative compares platform_a to platform_b. Every p-value column gets a *_adj column
+    corrected across the whole batch (holm, bonferroni or fdr_bh).
+    A movie on both platforms of a pair counts in both groups, as in the original analysis.
+    """
+    if alternative not in ALTERNATIVES:
+        raise ValueError(f"Unknown alternative '{alternative}', expected one of {ALTERNATIVES}.")
+    metrics = metrics if isinstance(metrics, dict) else {m: METRICS.get(m, m) for m in metrics}
+    pairs = list(itertools.combinations(platforms, 2))
+    membership = movies[list(platforms)].to_numpy(dtype=bool)
+    frames, tasks = [], []
+    for metric, column in metrics.items():
+        values = movies[column].to_numpy(dtype=float)
+        present = ~np.isnan(values)
+        groups = {p: values[membership[:, i] & present] for i, p in enumerate(platforms)}
+        n = np.array([len(groups[p]) for p in platforms], dtype=float)
+        mean = np.array([g.mean() if len(g) else np.nan for g in groups.values()])
+        var = np.array([g.var(ddof=1) if len(g) > 1 else np.nan for g in groups.values()])
+        a = np.array([platforms.index(p) for p, _ in pairs])
+        b = np.array([platforms.index(q) for _, q in pairs])
+
+        # Welch's t-test for all pairs at once
+        se2_a, se2_b = var[a] / n[a], var[b] / n[b]
+        t_stat = (mean[a] - mean[b]) / np.sqrt(se2_a + se2_b)
+        t_df = (se2_a + se2_b) ** 2 / (se2_a ** 2 / (n[a] - 1) + se2_b ** 2 / (n[b] - 1))
+        t_p = _p_value(stats.t.cdf(t_stat, t_df), stats.t.sf(t_stat, t_df), alternative)
+
+        u_stat, mw_p = np.full(len(pairs), np.nan), np.full(len(pairs), np.nan)
+        for i, (p, q) in enumerate(pairs):
+            if len(groups[p]) and len(groups[q]):
+                u_stat[i], mw_p[i] = stats.mannwhitneyu(groups[p], groups[q], alternative=alternative)
+            tasks.append((groups[p], groups[q], permutations, bootstrap, confidence, alternative, [seed, len(tasks)]))
+
+        frames.append(pd.DataFrame({
+            'metric': metric, 'platform_a': [p for p, _ in pairs], 'platform_b': [q for _, q in pairs],
+            'n_a': n[a].astype(int), 'n_b': n[b].astype(int), 'mean_a': mean[a], 'mean_b': mean[b],
+            'mean_diff': mean[a] - mean[b],
+            'median_a': [np.median(groups[p]) if len(groups[p]) else np.nan for p, _ in pairs],
+            'median_b': [np.median(groups[q]) if len(groups[q]) else np.nan for _, q in pairs],
+            't_stat': t_stat, 't_df': t_df, 't_p': t_p, 'u_stat': u_stat, 'mw_p': mw_p,
+            'rank_biserial': 2 * u_stat / (n[a] * n[b]) - 1,
+        }))
+    results = pd.concat(frames, ignore_index=True)
+
+    if permutations or bootstrap:
+        if n_jobs == 1:
+            resampled = [_resample_task(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+                resampled = list(pool.map(_resample_task, tasks))
+        results = pd.concat([results, pd.DataFrame(resampled)], axis=1)
+
+    for column in [c for c in results.columns if c.endswith('_p')]:
+        results[f"{column}_adj"] = adjust_pvalues(results[column].to_numpy(), correction)
+    return results
+
+
+def adjust_pvalues(p_values, method='holm'):
+    """Multiple-comparison adjusted p-values (NaN entries are left out of the family)."""
+    if method not in CORRECTIONS:
+        raise ValueError(f"Unknown correction '{method}', expected one of {CORRECTIONS}.")
+    p_values = np.asarray(p_values, dtype=float)
+    adjusted = np.full(len(p_values), np.nan)
+    valid = np.flatnonzero(~np.isnan(p_values))
+    p, m = p_values[valid], len(valid)
+    if m == 0:
+        return adjusted
+    if method == 'bonferroni':
+        adjusted[valid] = np.minimum(p * m, 1)
+        return adjusted
+    order = np.argsort(p)
+    if method == 'holm':
+        stepped = np.maximum.accumulate((m - np.arange(m)) * p[order])
+    else: # Benjamini-Hochberg: running minimum from the largest p-value down
+        stepped = np.minimum.accumulate((m / np.arange(m, 0, -1) * p[order][::-1]))[::-1]
+    adjusted[valid[order]] = np.minimum(stepped, 1)
+    return adjusted
+
+
+def _resample_task(task):
+    """
+    Permutation p-value and bootstrap interval for the difference in means of two groups.
+    Metrics take few distinct values (ages, whole scores, years), so each resample is drawn
+    as counts per distinct value: a multivariate hypergeometric draw for a permutation
+    (how many of each value land in group a) and a multinomial draw per group for a
+    bootstrap. This is exact, and costs resamples x distinct values instead of
+    resamples x rows.
+    """
+    a, b, permutations, bootstrap, confidence, alternative, seed = task
+    rng = np.random.default_rng(seed)
+    result = {}
+    if permutations:
+        result['perm_p'] = np.nan
+    if bootstrap:
+        result['boot_low'] = result['boot_high'] = np.nan
+    if len(a) == 0 or len(b) == 0:
+        return result
+
+    observed = a.mean() - b.mean()
+    if permutations:
+        distinct, counts = np.unique(np.concatenate([a, b]), return_counts=True)
+        total = counts @ distinct
+        diffs = np.concatenate([
+            (sums := rng.multivariate_hypergeometric(counts, len(a), size=size) @ distinct) / len(a)
+            - (total - sums) / len(b)
+            for size in _block_sizes(permutations, len(distinct))])
+        tolerance = 1e-9 * max(1.0, abs(observed))
+        extreme = {'two-sided': np.abs(diffs) >= abs(observed) - tolerance,
+                   'less': diffs <= observed + tolerance, 'greater': diffs >= observed - tolerance}[alternative]
+        result['perm_p'] = (1 + extreme.sum()) / (permutations + 1)
+    if bootstrap:
+        means = []
+        for group in (a, b):
+            distinct, counts = np.unique(group, return_counts=True)
+            means.append(np.concatenate([rng.multinomial(len(group), counts / len(group), size=size) @ distinct / len(group)
+                                         for size in _block_sizes(bootstrap, len(distinct))]))
+        tail = (1 - confidence) / 2 * 100
+        result['boot_low'], result['boot_high'] = np.percentile(means[0] - means[1], [tail, 100 - tail])
+    return result
+
+
+def _block_sizes(resamples, width):
+    """Splits resamples into blocks of at most RESAMPLE_BLOCK / width rows."""
+    block = max(1, RESAMPLE_BLOCK // max(width, 1))
+    return [min(block, resamples - start) for start in range(0, resamples, block)]
+
+
+def _p_value(lower, upper, alternative):
+    """p-value from the lower (cdf) and upper (sf) tail probabilities of a statistic."""
+    if alternative == 'less':
+        return lower
+    if alternative == 'greater':
+        return upper
+    return np.minimum(1, 2 * np.minimum(lower, upper))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare streaming platforms pairwise on every metric.")
+    parser.add_argument("csv", nargs="?", default="MoviesOnStreamingPlatforms.csv")
+    parser.add_argument("--platforms", nargs="+", default=PLATFORMS)
+    parser.add_argument("--metrics", nargs="+", default=list(METRICS), choices=list(METRICS))
+    parser.add_argument("--alternative", choices=ALTERNATIVES, default="two-sided")
+    parser.add_argument("--correction", choices=CORRECTIONS, default="holm")
+    parser.add_argument("--permutations", type=int, default=0)
+    parser.add_argument("--bootstrap", type=int, default=0)
+    parser.add_argument("--jobs", type=int, default=1)
+    parser.add_argument("--out", help="Write the results to this CSV file")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    movies = load_movies(args.csv, args.platforms)
+    results = compare_platforms(movies, args.platforms, args.metrics, args.alternative, args.correction,
+                                args.permutations, args.bootstrap, n_jobs=args.jobs)
+    print(f"{len(results)} tests in {time.perf_counter() - start:.2f}s")
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print(results.drop(columns=['median_a', 'median_b', 't_df', 'u_stat']).round(4).to_string(index=False))
+    if args.out:
+        results.to_csv(args.out, index=False)
@@ -1,8 +1,19 @@
+import os
+import sys
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import linear_kernel
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # shared modules live at the repo root
+from Book_Similarity import BACKENDS, catalogue_hash, load_or_fit_model
+
+
+# --- Cached model: fitted once per catalogue, reused across reruns and restarts ---
+@st.cache_resource(max_entries=4)
+def get_recommender(content_hash, backend, _titles, _descriptions):
+    # Keyed by content_hash only; the underscored arguments are not hashed by Streamlit
+    _, recommender = load_or_fit_model(_titles, _descriptions, k=10, backend=backend, key=content_hash)
+    return recommender
 
 # Streamlit app title
 st.title("Book Recommendation System")
@@ -43,18 +54,14 @@ if uploaded_file:
 
         # TF-IDF and Similarity Calculation
         st.subheader("Book Similarity Analysis")
-        feature = data["book_desc"].tolist()
-        tfidf = TfidfVectorizer(input="content", stop_words="english")
-        tfidf_matrix = tfidf.fit_transform(feature)
-        similarity = linear_kernel(tfidf_matrix, tfidf_matrix)
+        backend = st.selectbox("Similarity backend:", list(BACKENDS), format_func=BACKENDS.get)
+        content_hash = catalogue_hash(data["book_title"], data["book_desc"], k=10, backend=backend)
+        recommender = get_recommender(content_hash, backend, data["book_title"].tolist(), data["book_desc"].tolist()) # cached per catalogue and backend
 
         # Interactive similarity finder
         selected_book = st.selectbox("Select a book to find similar ones:", data["book_title"])
         if selected_book:
-            book_index = data[data["book_title"] == selected_book].index[0]
-            sim_scores = list(enumerate(similarity[book_index]))
-            sim_scores = sorted(sim_scores, key=lambda x: x[1], reverse=True)
-            top_similar_books = [data.iloc[i[0]]["book_title"] for i in sim_scores[1:6]]
+            top_similar_books = recommender.recommend(selected_book, n=5)
             
             st.write(f"Books similar to '{selected_book}':")
             for book in top_similar_books:
@@ -0,0 +1,456 @@
+import hashlib
+import json
+import os
+import pickle
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from concurrent.futures import ProcessPoolExecutor
+import time
+
+# Dense scratch budget per block of similarity rows (number of float64 entries, ~256 MB)
+BLOCK_ENTRIES = 32_000_000
+# Fitted models are kept on disk per catalogue; the least recently used are evicted
+MODEL_CACHE_DIR = '.book_model_cache'
+MODEL_CACHE_ENTRIES = 8
+# Similarity backends selectable from the apps
+BACKENDS = {'exact': 'Exact (sparse top-k)', 'ann': 'Approximate (SVD + IVF)'}
+
+class TopKIndex:
+    """
+    Sparse top-k neighbour index over the rows of a TF-IDF matrix.
+    Each book keeps only its k most similar books (by cosine similarity), so memory grows
+    linearly with the catalogue and a lookup is a slice of k entries.
+    """
+
+    def __init__(self, neighbors, scores):
+        self.neighbors = neighbors # (n_books, k) int32 row positions, best match first
+        self.scores = scores       # (n_books, k) float32 cosine similarities
+
+    @property
+    def k(self):
+        return self.neighbors.shape[1]
+
+    def __len__(self):
+        return self.neighbors.shape[0]
+
+    def lookup(self, row, n=None):
+        """Returns (positions, scores) of the n best neighbours of a row."""
+        n = self.k if n is None else min(n, self.k)
+        positions, scores = self.neighbors[row, :n], self.scores[row, :n]
+        valid = positions >= 0 # rows with fewer than k other books are padded with -1
+        return positions[valid], scores[valid]
+
+    def search(self, positions, n):
+        """(positions, scores) arrays of shape (len(positions), min(n, k)) for rows of the catalogue."""
+        n = min(n, self.k)
+        return self.neighbors[positions, :n], self.scores[positions, :n]
+
+class IVFIndex:
+    """
+    Approximate nearest-neighbour index (inverted file) over dense, L2-normalised book vectors.
+    Books are grouped by their nearest k-means centroid; a query only scores the books in the
+    n_probe lists whose centroids are closest to it, so a lookup touches a small fraction of
+    the catalogue instead of all of it. With a tfidf_matrix and rerank > 1, rerank * n
+    candidates are fetched and rescored with the exact TF-IDF cosine.
+    """
+
+    def __init__(self, vectors, centroids, assignments, n_probe=8, tfidf_matrix=None, rerank=1):
+        self.vectors = vectors     # (n_books, d) float32
+        self.centroids = centroids # (n_lists, d) float32
+        self.n_probe = n_probe
+        self.tfidf_matrix = tfidf_matrix
+        self.rerank = rerank
+        self.list_members = np.argsort(assignments, kind='stable').astype(np.int32)
+        self.list_offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=len(centroids)))])
+
+    def __len__(self):
+        return self.vectors.shape[0]
+
+    def search_vectors(self, queries, n, exclude=None):
+        """
+        Approximate top-n books for each query vector, best first, padded with -1 / 0.0.
+        exclude optionally gives one book position per query to leave out (the query itself).
+        """
+        neighbors = np.full((len(queries), n), -1, dtype=np.int32)
+        scores = np.zeros((len(queries), n), dtype=np.float32)
+        n_probe = min(self.n_probe, len(self.centroids))
+        if n == 0 or n_probe == 0:
+            return neighbors, scores
+        probes = np.argpartition(-(queries @ self.centroids.T), n_probe - 1, axis=1)[:, :n_probe]
+        for query_index, query in enumerate(queries):
+            candidates = np.concatenate([self.list_members[self.list_offsets[c]:self.list_offsets[c + 1]]
+                                         for c in probes[query_index]])
+            if exclude is not None:
+                candidates = candidates[candidates != exclude[query_index]]
+            m = min(n, len(candidates))
+            if m == 0:
+                continue
+            similarity = self.vectors[candidates] @ query
+            top = np.argpartition(-similarity, m - 1)[:m]
+            top = top[np.argsort(-similarity[top], kind='stable')]
+            neighbors[query_index, :m], scores[query_index, :m] = candidates[top], similarity[top]
+        return neighbors, scores
+
+    def search(self, positions, n):
+        """Approximate neighbours for rows of the catalogue, excluding each row itself."""
+        positions = np.asarray(positions)
+        if self.tfidf_matrix is None or self.rerank <= 1:
+            return self.search_vectors(self.vectors[positions], n, exclude=positions)
+
+        candidates, _ = self.search_vectors(self.vectors[positions], n * self.rerank, exclude=positions)
+        neighbors = np.full((len(positions), n), -1, dtype=np.int32)
+        scores = np.zeros((len(positions), n), dtype=np.float32)
+        for query_index, position in enumerate(positions):
+            found = candidates[query_index][candidates[query_index] >= 0]
+            m = min(n, len(found))
+            if m == 0:
+                continue
+            similarity = (self.tfidf_matrix[found] @ self.tfidf_matrix[position].T).toarray().ravel()
+            top = np.argsort(-similarity, kind='stable')[:m]
+            neighbors[query_index, :m], scores[query_index, :m] = found[top], similarity[top]
+        return neighbors, scores
+
+class BookRecommender:
+    """
+    Title-based recommendation queries over a TopKIndex (exact) or an IVFIndex (approximate).
+    Titles are resolved through a hash index (first occurrence wins for duplicate titles),
+    and whole batches of queries are answered with array indexing rather than per-title loops.
+    """
+
+    def __init__(self, titles, index, tfidf_matrix=None):
+        self.titles = np.asarray(titles, dtype=object)
+        self.index = index
+        self.tfidf_matrix = tfidf_matrix # only needed for queries asking for more than index.k results
+        self.updates_since_fit = 0 # books added/changed by update_catalogue since the vectorizer was fitted
+        positions = pd.Series(np.arange(len(self.titles)), index=self.titles)
+        self._positions = positions[~positions.index.duplicated()]
+
+    def resolve(self, titles):
+        """Row positions for a batch of titles (-1 for unknown titles)."""
+        found = self._positions.index.get_indexer(pd.Index(titles, dtype=object))
+        return np.where(found >= 0, self._positions.to_numpy()[found], -1)
+
+    def neighbors(self, positions, n=5):
+        """(positions, scores) arrays of shape (len(positions), n) for rows of the catalogue."""
+        positions = np.asarray(positions)
+        if not isinstance(self.index, TopKIndex) or n <= self.index.k or self.tfidf_matrix is None:
+            return self.index.search(positions, n)
+        # More neighbours than the index keeps: exact search, in blocks to bound the scratch memory
+        block_rows = max(1, BLOCK_ENTRIES // max(self.tfidf_matrix.shape[0], 1))
+        blocks = [topk_rows(self.tfidf_matrix[positions[i:i + block_rows]], self.tfidf_matrix, n,
+                            self_rows=positions[i:i + block_rows])
+                  for i in range(0, len(positions), block_rows)]
+        if not blocks:
+            return np.empty((0, n), dtype=np.int32), np.empty((0, n), dtype=np.float32)
+        return np.vstack([b[0] for b in blocks]), np.vstack([b[1] for b in blocks])
+
+    def recommend(self, title, n=5):
+        """Titles of the n books most similar to one title (empty if the title is unknown)."""
+        position = self.resolve([title])[0]
+        if position < 0:
+            return []
+        neighbor_positions, _ = self.neighbors([position], n)
+        neighbor_positions = neighbor_positions[0]
+        return self.titles[neighbor_positions[neighbor_positions >= 0]].tolist()
+
+    def recommend_batch(self, titles, n=5):
+        """
+        Recommendations for many titles in one call, as a long DataFrame with columns
+        query, rank, title and score. Unknown titles are skipped.
+        """
+        titles = np.asarray(titles, dtype=object)
+        positions = self.resolve(titles)
+        known = positions >= 0
+        neighbor_positions, scores = self.neighbors(positions[known], n)
+        query, rank = np.nonzero(neighbor_positions >= 0)
+        return pd.DataFrame({
+            'query': titles[known][query],
+            'rank': rank + 1,
+            'title': self.titles[neighbor_positions[query, rank]],
+            'score': scores[query, rank],
+        })
+
+    def recommend_all(self, n=5):
+        """Precomputes recommendations for every title in the catalogue."""
+        return self.recommend_batch(self._positions.index.to_numpy(), n)
+
+def build_recommender(titles, tfidf_matrix, k=10, n_jobs=1, backend='exact', **ann_params):
+    """
+    Builds the similarity index for a catalogue and wraps it for title queries.
+    backend='exact' precomputes the sparse top-k index; backend='ann' builds an IVFIndex
+    (see build_ann_index for ann_params) for catalogues too large for exact search.
+    """
+    if backend == 'ann':
+        return BookRecommender(titles, build_ann_index(tfidf_matrix, **ann_params), tfidf_matrix)
+    if backend != 'exact':
+        raise ValueError(f"Unknown similarity backend '{backend}', expected one of {list(BACKENDS)}.")
+    return BookRecommender(titles, build_topk_index(tfidf_matrix, k=k, n_jobs=n_jobs), tfidf_matrix)
+
+def build_ann_index(tfidf_matrix, n_components=128, n_lists=None, n_probe=8, rerank=4, seed=42):
+    """
+    Reduces TF-IDF rows to dense vectors with truncated SVD and indexes them in an IVFIndex.
+    n_lists defaults to about 4 * sqrt(n_books) k-means lists; raising n_probe or rerank
+    trades latency for recall.
+    """
+    from sklearn.cluster import MiniBatchKMeans # scikit-learn is imported on first use: it takes seconds
+    from sklearn.decomposition import TruncatedSVD
+    from sklearn.preprocessing import normalize
+    tfidf_matrix = tfidf_matrix.tocsr()
+    n_books = tfidf_matrix.shape[0]
+    n_components = max(1, min(n_components, min(tfidf_matrix.shape) - 1))
+    vectors = TruncatedSVD(n_components=n_components, random_state=seed).fit_transform(tfidf_matrix)
+    vectors = normalize(vectors).astype(np.float32)
+    n_lists = max(1, min(n_books, n_lists or int(4 * np.sqrt(n_books))))
+    kmeans = MiniBatchKMeans(n_clusters=n_lists, random_state=seed, n_init=3, batch_size=max(1024, 4 * n_lists))
+    assignments = kmeans.fit_predict(vectors)
+    centroids = normalize(kmeans.cluster_centers_).astype(np.float32)
+    return IVFIndex(vectors, centroids, assignments, n_probe=n_probe, tfidf_matrix=tfidf_matrix, rerank=rerank)
+
+def benchmark_ann(tfidf_matrix, k=10, n_queries=500, n_probes=(1, 4, 8, 16), seed=42, **ann_params):
+    """
+    Compares the ANN backend with the exact linear_kernel path on n_queries random books:
+    recall@k against the exact top-k and per-query latency (p50/p99, ms), plus build time.
+    Returns one row per backend / n_probe setting.
+    """
+    from sklearn.metrics.pairwise import linear_kernel
+    tfidf_matrix = tfidf_matrix.tocsr()
+    rng = np.random.default_rng(seed)
+    queries = rng.choice(tfidf_matrix.shape[0], min(n_queries, tfidf_matrix.shape[0]), replace=False)
+
+    exact, exact_ms = [], []
+    for position in queries:
+        start = time.perf_counter()
+        similarity = linear_kernel(tfidf_matrix[position], tfidf_matrix)[0]
+        similarity[position] = -np.inf
+        exact.append(set(np.argsort(-similarity, kind='stable')[:k]))
+        exact_ms.append((time.perf_counter() - start) * 1000)
+    rows = [{'backend': 'exact (linear_kernel)', 'n_probe': None, 'rerank': None, 'build_s': 0.0,
+             f'recall@{k}': 1.0, 'p50_ms': np.percentile(exact_ms, 50), 'p99_ms': np.percentile(exact_ms, 99)}]
+
+    start = time.perf_counter()
+    index = build_ann_index(tfidf_matrix, seed=seed, **ann_params)
+    build_s = time.perf_counter() - start
+    for n_probe in n_probes:
+        index.n_probe = n_probe
+        hits, ann_ms = 0, []
+        for position, expected in zip(queries, exact):
+            start = time.perf_counter()
+            found, _ = index.search([position], k)
+            ann_ms.append((time.perf_counter() - start) * 1000)
+            hits += len(expected.intersection(found[0][found[0] >= 0].tolist()))
+        rows.append({'backend': 'ann (SVD + IVF)', 'n_probe': n_probe, 'rerank': index.rerank, 'build_s': build_s,
+                     f'recall@{k}': hits / (k * len(queries)),
+                     'p50_ms': np.percentile(ann_ms, 50), 'p99_ms': np.percentile(ann_ms, 99)})
+    return pd.DataFrame(rows)
+
+def catalogue_hash(titles, descriptions, **params):
+    """Content hash of a catalogue (titles and descriptions, in order) plus model parameters."""
+    frame = pd.DataFrame({'title': pd.Series(titles, dtype=object).to_numpy(),
+                          'desc': pd.Series(descriptions, dtype=object).to_numpy()})
+    digest = hashlib.sha256(json.dumps(params, sort_keys=True).encode())
+    digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def load_or_fit_model(titles, descriptions, k=10, backend='exact', key=None,
+                      cache_dir=MODEL_CACHE_DIR, max_entries=MODEL_CACHE_ENTRIES):
+    """
+    Returns (vectorizer, recommender) for a catalogue, reusing the fitted TF-IDF vectorizer,
+    matrix and similarity index saved on disk for the same content hash when there is one.
+    """
+    key = key or catalogue_hash(titles, descriptions, k=k, backend=backend)
+    path = os.path.join(cache_dir, f"{key}.pkl")
+    if os.path.exists(path):
+        os.utime(path) # mark as recently used
+        return load_model(path)
+
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    vectorizer = TfidfVectorizer(input="content", stop_words="english")
+    tfidf_matrix = vectorizer.fit_transform(list(descriptions))
+    recommender = build_recommender(titles, tfidf_matrix, k=k, backend=backend)
+
+    save_model(path, vectorizer, recommender)
+    _evict_models(cache_dir, max_entries)
+    return vectorizer, recommender
+
+def save_model(path, vectorizer, recommender):
+    """Pickles a fitted vectorizer and recommender (matrix, titles and similarity index) to path."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump({'vectorizer': vectorizer, 'tfidf_matrix': recommender.tfidf_matrix, 'titles': recommender.titles,
+                     'index': recommender.index, 'updates_since_fit': recommender.updates_since_fit},
+                    f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+def load_model(path):
+    """Loads (vectorizer, recommender) saved by save_model."""
+    with open(path, 'rb') as f:
+        artifacts = pickle.load(f)
+    recommender = BookRecommender(artifacts['titles'], artifacts['index'], artifacts['tfidf_matrix'])
+    recommender.updates_since_fit = artifacts.get('updates_since_fit', 0)
+    return artifacts['vectorizer'], recommender
+
+def update_catalogue(vectorizer, recommender, titles, descriptions):
+    """
+    Applies a catalogue delta to a recommender in place: unknown titles are appended and known
+    titles get their description replaced. The delta is transformed with the fitted vectorizer
+    (frozen vocabulary and IDF), and only neighbour lists that can change are touched:
+    the delta books' own lists and lists that held a changed book are searched again exactly,
+    every other list merges in its similarity to the delta books. The work is proportional
+    to the delta times the catalogue size, not to a full N x N rebuild.
+    Returns the positions of the rows whose neighbour lists were recomputed or merged.
+    Once enough books have changed (see needs_refresh) refit with load_or_fit_model.
+    Only the exact backend supports incremental updates.
+    """
+    if not isinstance(recommender.index, TopKIndex):
+        raise TypeError("Incremental updates need the exact top-k index (backend='exact').")
+    delta = pd.DataFrame({'title': pd.Series(titles, dtype=object).to_numpy(),
+                          'desc': pd.Series(descriptions, dtype=object).to_numpy()})
+    delta = delta.drop_duplicates('title', keep='last')
+    delta_matrix = vectorizer.transform(delta['desc'].tolist()).tocsr()
+    positions = recommender.resolve(delta['title'])
+    is_new = positions < 0
+    n_old = len(recommender.titles)
+    positions[is_new] = n_old + np.arange(is_new.sum())
+    changed = positions[~is_new]
+
+    # Append the new rows, then swap the changed rows in
+    matrix = sp.vstack([recommender.tfidf_matrix, delta_matrix[is_new]]).tocsr()
+    if len(changed):
+        order = np.arange(matrix.shape[0])
+        order[changed] = matrix.shape[0] + np.arange(len(changed))
+        matrix = sp.vstack([matrix, delta_matrix[~is_new]]).tocsr()[order]
+    n_books, k = matrix.shape[0], recommender.index.k
+
+    neighbors = np.vstack([recommender.index.neighbors, np.full((is_new.sum(), k), -1, dtype=np.int32)])
+    scores = np.vstack([recommender.index.scores, np.zeros((is_new.sum(), k), dtype=np.float32)])
+
+    # Lists holding a changed book may lose it, and their next-best neighbour is not stored
+    stale = np.zeros(n_books, dtype=bool)
+    if len(changed):
+        stale[:n_old] = np.isin(recommender.index.neighbors, changed).any(axis=1)
+    stale[positions] = True
+
+    # Merge the delta books into every other list, in blocks of rows
+    merged = np.zeros(n_books, dtype=bool)
+    delta_columns = matrix[positions].T.tocsc()
+    block_rows = max(1, BLOCK_ENTRIES // max(len(positions) + k, 1))
+    for start in range(0, n_books, block_rows):
+        rows = np.arange(start, min(start + block_rows, n_books))
+        rows = rows[~stale[rows]]
+        if len(rows) == 0 or k == 0:
+            continue
+        candidate_scores = (matrix[rows] @ delta_columns).toarray()
+        current_scores = np.where(neighbors[rows] >= 0, scores[rows], -np.inf)
+        all_scores = np.hstack([current_scores, candidate_scores])
+        all_positions = np.hstack([neighbors[rows], np.broadcast_to(positions, candidate_scores.shape)])
+        top = np.argpartition(-all_scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(all_scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        top, top_scores = np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+        new_neighbors = np.where(np.isfinite(top_scores), np.take_along_axis(all_positions, top, axis=1), -1)
+        updated = (new_neighbors != neighbors[rows]).any(axis=1)
+        neighbors[rows[updated]] = new_neighbors[updated]
+        scores[rows[updated]] = np.where(np.isfinite(top_scores), top_scores, 0.0)[updated]
+        merged[rows[updated]] = True
+
+    # Exact search for the delta books and the stale lists
+    stale_rows = np.flatnonzero(stale)
+    block_rows = max(1, BLOCK_ENTRIES // max(n_books, 1))
+    for start in range(0, len(stale_rows), block_rows):
+        rows = stale_rows[start:start + block_rows]
+        neighbors[rows], scores[rows] = topk_rows(matrix[rows], matrix, k, self_rows=rows)
+
+    recommender.titles = np.concatenate([recommender.titles, delta['title'].to_numpy()[is_new]])
+    recommender.tfidf_matrix = matrix
+    recommender.index = TopKIndex(neighbors, scores)
+    new_positions = pd.Series(positions[is_new], index=recommender.titles[n_old:])
+    recommender._positions = pd.concat([recommender._positions, new_positions])
+    recommender.updates_since_fit += len(delta)
+    return np.flatnonzero(stale | merged)
+
+def needs_refresh(recommender, refresh_fraction=0.1):
+    """
+    True once the books added or changed since the last fit exceed refresh_fraction of the
+    catalogue, at which point the frozen vocabulary/IDF should be refitted.
+    """
+    return recommender.updates_since_fit > refresh_fraction * len(recommender.titles)
+
+def _evict_models(cache_dir, max_entries):
+    """Deletes all but the max_entries most recently used model files."""
+    paths = [os.path.join(cache_dir, name) for name in os.listdir(cache_dir) if name.endswith('.pkl')]
+    for path in sorted(paths, key=os.path.getmtime, reverse=True)[max_entries:]:
+        os.remove(path)
+
+def build_topk_index(tfidf_matrix, k=10, n_jobs=1, block_rows=None):
+    """
+    Builds a TopKIndex from an L2-normalised sparse TF-IDF matrix (TfidfVectorizer's default),
+    where the dot product of two rows is their cosine similarity.
+    Similarities are computed in blocks of rows (tfidf_matrix[block] @ tfidf_matrix.T) so the
+    full N x N matrix never exists; with n_jobs > 1 the blocks are spread over a process pool.
+    """
+    tfidf_matrix = tfidf_matrix.tocsr()
+    n_books = tfidf_matrix.shape[0]
+    k = max(0, min(k, n_books - 1))
+    if block_rows is None:
+        block_rows = max(1, min(n_books, BLOCK_ENTRIES // max(n_books, 1)))
+    starts = list(range(0, n_books, block_rows))
+
+    if n_jobs == 1 or len(starts) == 1:
+        # In-process: no worker globals, so the matrix is not kept alive after the index is built
+        blocks = [topk_rows(tfidf_matrix[start:start + block_rows], tfidf_matrix, k,
+                            self_rows=np.arange(start, min(start + block_rows, n_books)))
+                  for start in starts]
+    else:
+        with ProcessPoolExecutor(max_workers=None if n_jobs == -1 else n_jobs,
+                                 initializer=_init_worker, initargs=(tfidf_matrix, k)) as pool:
+            blocks = list(pool.map(_topk_block, starts, [block_rows] * len(starts)))
+
+    neighbors = np.vstack([b[0] for b in blocks]) if blocks else np.empty((0, k), dtype=np.int32)
+    scores = np.vstack([b[1] for b in blocks]) if blocks else np.empty((0, k), dtype=np.float32)
+    return TopKIndex(neighbors, scores)
+
+# Matrix shared with the block workers (set once per process instead of pickled per block)
+_worker_matrix = None
+_worker_k = None
+
+def _init_worker(tfidf_matrix, k):
+    global _worker_matrix, _worker_k
+    _worker_matrix, _worker_k = tfidf_matrix, k
+
+def _topk_block(start, block_rows):
+    """Top-k neighbours for rows [start, start + block_rows) of the shared matrix."""
+    query_rows = _worker_matrix[start:start + block_rows]
+    return topk_rows(query_rows, _worker_matrix, _worker_k, self_rows=np.arange(start, start + query_rows.shape[0]))
+
+def topk_rows(query_rows, tfidf_matrix, k, self_rows=None):
+    """
+    Top-k most similar rows of tfidf_matrix for each query row, best first, using a
+    partial selection (argpartition) instead of sorting every similarity.
+    When the queries are rows of tfidf_matrix, self_rows gives their positions so each
+    row's match with itself is excluded. Missing neighbours are padded with -1 / 0.0.
+    """
+    if k == 0 or query_rows.shape[0] == 0:
+        return np.full((query_rows.shape[0], k), -1, dtype=np.int32), np.zeros((query_rows.shape[0], k), dtype=np.float32)
+    return topk_of_similarity((query_rows @ tfidf_matrix.T).toarray(), k, self_rows)
+
+def topk_of_similarity(similarity, k, self_rows=None):
+    """Top-k columns of each row of a dense similarity block, best first (see topk_rows)."""
+    n_queries = similarity.shape[0]
+    neighbors = np.full((n_queries, k), -1, dtype=np.int32)
+    scores = np.zeros((n_queries, k), dtype=np.float32)
+    if k == 0 or n_queries == 0:
+        return neighbors, scores
+    if self_rows is not None:
+        similarity[np.arange(n_queries), self_rows] = -np.inf
+    k_eff = min(k, similarity.shape[1])
+    top = np.argpartition(-similarity, k_eff - 1, axis=1)[:, :k_eff]
+    top_scores = np.take_along_axis(similarity, top, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind='stable')
+    top, top_scores = np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+    valid = np.isfinite(top_scores)
+    neighbors[:, :k_eff] = np.where(valid, top, -1)
+    scores[:, :k_eff] = np.where(valid, top_scores, 0.0)
+    return neighbors, scores
@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+
+# Upper bounds on what a chart sends to the browser, whatever the size of the dataset
+MAX_POINTS = 5000       # line / scatter points
+SCATTER_GRID = 100      # density bins per axis once a scatter is aggregated
+MAX_BARS = 50           # bar chart categories (the rest are summed into "Other")
+
+
+def reduce_line(df, x, y, max_points=MAX_POINTS, method='lttb'):
+    """
+    Sorts a line series by x and decimates it to at most max_points points.
+    method='lttb' keeps the visually significant points (Largest-Triangle-Three-Buckets);
+    method='minmax' keeps each bucket's minimum and maximum, preserving spikes exactly.
+    """
+    data = df[_columns(x, y)].dropna().sort_values(x, kind='stable')
+    if len(data) <= max_points:
+        return data
+    xs = data[x].to_numpy(dtype=float)
+    ys = data[y].to_numpy(dtype=float)
+    keep = lttb_indices(xs, ys, max_points) if method == 'lttb' else minmax_indices(ys, max_points // 2)
+    return data.iloc[keep]
+
+
+def lttb_indices(x, y, n_out):
+    """Row indices chosen by Largest-Triangle-Three-Buckets downsampling (first and last kept)."""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int) # n_out - 2 buckets between the end points
+    keep = np.empty(n_out, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(n_out - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        # The third vertex is the average of the next bucket (or the last point)
+        next_start, next_end = end, edges[bucket + 2] if bucket + 2 < len(edges) else n
+        avg_x, avg_y = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+        area = np.abs((x[previous] - avg_x) * (y[start:end] - y[previous])
+                      - (x[previous] - x[start:end]) * (avg_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        keep[bucket + 1] = previous
+    return keep
+
+
+def minmax_indices(y, n_buckets):
+    """Row indices of the minimum and maximum of each of n_buckets equal-size buckets, in order."""
+    n = len(y)
+    if 2 * n_buckets >= n or n_buckets < 1:
+        return np.arange(n)
+    edges = np.linspace(0, n, n_buckets + 1).astype(int)
+    starts, sizes = edges[:-1], np.diff(edges)
+    width = sizes.max()
+    # Pad the buckets to a common width so the extremes are found with one vectorized pass
+    offsets = np.minimum(np.arange(width), sizes[:, None] - 1)
+    windows = y[starts[:, None] + offsets]
+    lows = starts + windows.argmin(axis=1)
+    highs = starts + windows.argmax(axis=1)
+    return np.unique(np.concatenate([lows, highs]))
+
+
+def reduce_histogram(values, bins):
+    """Bins a column with NumPy on the server; the chart then draws one bar per bin."""
+    values = pd.Series(values).dropna().to_numpy(dtype=float)
+    counts, edges = np.histogram(values, bins=bins)
+    return pd.DataFrame({'bin_start': edges[:-1], 'bin_end': edges[1:],
+                         'bin_center': (edges[:-1] + edges[1:]) / 2, 'count': counts})
+
+
+def reduce_scatter(df, x, y, max_points=MAX_POINTS, grid=SCATTER_GRID):
+    """
+    Returns (data, aggregated). Scatters of up to max_points points are returned as-is;
+    larger ones are aggregated into a grid x grid density table of non-empty cells
+    (columns x, y and count), to be drawn as a density heatmap.
+    """
+    data = df[_columns(x, y)].dropna()
+    if len(data) <= max_points:
+        return data, False
+    counts, x_edges, y_edges = np.histogram2d(data[x].to_numpy(dtype=float), data[y].to_numpy(dtype=float), bins=grid)
+    x_index, y_index = np.nonzero(counts)
+    density = pd.DataFrame({x: (x_edges[x_index] + x_edges[x_index + 1]) / 2,
+                            y: (y_edges[y_index] + y_edges[y_index + 1]) / 2,
+                            'count': counts[x_index, y_index]})
+    return density, True
+
+
+def _columns(x, y):
+    """The columns a chart needs (once, even when x and y are the same column)."""
+    return [x] if x == y else [x, y]
+
+
+def reduce_bar(df, x, y=None, max_bars=MAX_BARS):
+    """
+    Pre-groups a bar chart: the sum of y per category of x (or the row count when y is None),
+    largest first, with categories beyond max_bars folded into "Other".
+    """
+    if y is None:
+        grouped = df[x].value_counts(sort=False).rename('count')
+    else:
+        grouped = df.groupby(x, observed=True, sort=False)[y].sum()
+    grouped = grouped.sort_values(ascending=False)
+    if len(grouped) > max_bars:
+        other = grouped.iloc[max_bars - 1:].sum()
+        grouped = grouped.iloc[:max_bars - 1]
+        grouped.index = grouped.index.astype(str)
+        grouped.loc['Other'] = other
+    return grouped.rename_axis(x).reset_index()
@@ -1,20 +1,76 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 import io  # For handling file-like objects
-from st_aggrid import AgGrid, GridOptionsBuilder  # For interactive table
+import os
+from Data_Ingestion import ingest_upload  # Chunked parsing, dtype narrowing and incremental stats
+from Data_Grid import FILTER_OPS, GridView  # Server-side paging, sorting and filtering
+from Chart_Reduction import reduce_bar, reduce_histogram, reduce_line, reduce_scatter  # Bounded chart payloads
+from Data_Cache import ResultCache  # Memoized profiling and chart data, keyed by upload content hash
 
 # --- Helper Functions ---
-def display_data_grid(df):
-    """Displays a dataframe using AgGrid with interactive features."""
-    gb = GridOptionsBuilder.from_dataframe(df)
-    gb.configure_pagination()
+@st.cache_resource(max_entries=2)
+def get_grid_view(dataset_path, _dataset):
+    """One paging view per upload (keyed by its content-hash path), reading the spilled dataset on demand."""
+    return GridView(_dataset)
+
+@st.cache_resource
+def get_result_cache():
+    """One memory-bounded LRU of derived results, shared by every rerun and session."""
+    return ResultCache()
+
+def load_upload(uploaded_file):
+    """
+    Ingests an upload once per session: later reruns for the same upload reuse the dataset
+    instead of re-hashing the file and re-reading its metadata.
+    """
+    upload_id = (uploaded_file.name, uploaded_file.size, getattr(uploaded_file, "file_id", None))
+    cached = st.session_state.get("upload")
+    if cached is not None and cached[0] == upload_id:
+        return cached[1]
+
+    # Parse in chunks and spill to disk; summary statistics update as chunks arrive
+    progress = st.empty()
+    def show_progress(rows_read, stats):
+        with progress.container():
+            st.write(f"Read {rows_read:,} rows so far...")
+            st.write(stats.describe())
+    dataset = ingest_upload(uploaded_file, uploaded_file.name, on_chunk=show_progress)
+    progress.empty()
+    st.session_state["upload"] = (upload_id, dataset)
+    return dataset
+
+def display_data_grid(view, page_size=100):
+    """
+    Displays one page of the dataset using AgGrid with interactive features.
+    Paging, sorting and filtering run on the server; only the visible page is sent to the grid.
+    """
+    from st_aggrid import AgGrid, GridOptionsBuilder  # Imported once there is data to show, not on every page load
+    columns = view.columns
+    sort_col, order_col, filter_col, op_col, value_col = st.columns([3, 2, 3, 2, 3])
+    sort_by = sort_col.selectbox("Sort by", [None] + columns, format_func=lambda c: "(none)" if c is None else c)
+    ascending = order_col.radio("Order", ["Ascending", "Descending"], horizontal=True) == "Ascending"
+    filter_by = filter_col.selectbox("Filter column", [None] + columns, format_func=lambda c: "(none)" if c is None else c)
+    filter_op = op_col.selectbox("Operator", FILTER_OPS, index=FILTER_OPS.index('contains'))
+    filter_value = value_col.text_input("Value")
+    filters = [(filter_by, filter_op, filter_value)] if filter_by is not None and filter_value != "" else []
+
+    try:
+        matching_rows = view.count(sort_by, ascending, filters)
+    except ValueError:
+        st.warning(f"'{filter_value}' is not a valid value for {filter_by}; showing unfiltered rows.")
+        filters = []
+        matching_rows = view.count(sort_by, ascending, filters)
+    n_pages = max(1, -(-matching_rows // page_size))
+    page = st.number_input(f"Page (of {n_pages}, {matching_rows:,} matching rows)", 1, n_pages, 1) - 1
+    page_df, _ = view.query(page, page_size, sort_by, ascending, filters)
+
+    gb = GridOptionsBuilder.from_dataframe(page_df)
     gb.configure_side_bar()
     gb.configure_selection('multiple', use_checkbox=True, groupSelectsChildren="Group checkbox select children") #enable multi-select
     gridOptions = gb.build()
 
     grid_response = AgGrid(
-        df,
+        page_df,
         gridOptions=gridOptions,
         data_return_mode='AS_INPUT',
         update_mode='MODEL_CHANGED',
@@ -23,7 +79,7 @@ def display_data_grid(df):
         enable_enterprise_modules=True,
         height=350,
         width='100%',
-        reload_data=True
+        reload_data=True  # the page itself is small; it changes whenever page/sort/filter change
     )
 
     selected_rows = grid_response['selected_rows']
@@ -43,19 +99,25 @@ if uploaded_file is not None:
     # Step 2: Load the dataset
     try:
         file_extension = uploaded_file.name.split('.')[-1].lower()  #get the extension
-        if file_extension == 'csv':
-            df = pd.read_csv(uploaded_file) #using pd.read_csv directly
-        elif file_extension == 'xlsx':
-             df = pd.read_excel(uploaded_file)  # using pd.read_excel directly
-        else:
+        if file_extension not in ('csv', 'xlsx'):
             st.error("Unsupported file format. Please upload a CSV or Excel file.")
             st.stop()  # Stop execution if the file format is unsupported
 
+        dataset = load_upload(uploaded_file)
+        view = get_grid_view(dataset.path, dataset)
+        # Everything derived from the data is memoized under the upload's content hash
+        results = get_result_cache()
+        content_key = os.path.basename(dataset.path)
+        def memo(operation, params, compute):
+            return results.get_or_compute(content_key, operation, params, compute)
+        def projected(*columns):  # Charts read only the columns they plot from the spilled dataset
+            return dataset.load(list(dict.fromkeys(columns)))
+
         st.success("File successfully uploaded and processed!")
 
         # Step 3: Display Dataset with interactive features
         st.subheader("2. Interactive Dataset Preview")
-        selected_df = display_data_grid(df) # Display with AgGrid
+        selected_df = display_data_grid(view) # Display one server-side page with AgGrid
         if not selected_df.empty:
              st.write("Rows Selected:",selected_df.shape[0])
              with st.expander("View Selected Data"):
@@ -63,22 +125,22 @@ if uploaded_file is not None:
 
         # Step 4: Basic data analysis
         st.subheader("3. Basic Data Analysis")
-        st.write("**Shape of the dataset:**", df.shape)
-        st.write("**Columns in the dataset:**", list(df.columns))
+        st.write("**Shape of the dataset:**", dataset.shape)
+        st.write("**Columns in the dataset:**", dataset.columns)
 
-        if not df.empty: #check the df not empty before display
+        if dataset.n_rows: #check the df not empty before display
              st.write("**Summary statistics:**")
-             st.write(df.describe())
+             st.write(memo("describe", (), lambda: dataset.stats.describe(dataset.numeric_columns))) # computed while reading
         else:
            st.warning("DataFrame is empty, no summary statistics to show.")
 
 
         # Step 5: Interactive Visualization
         st.subheader("4. Interactive Visualizations")
+        import plotly.express as px  # Imported once there is data to plot
 
         # Select columns for visualization
-        numeric_columns = df.select_dtypes(include=["number"]).columns
-        categorical_columns = df.select_dtypes(include=["object"]).columns
+        numeric_columns, categorical_columns = memo("column_types", (), lambda: (dataset.numeric_columns, dataset.categorical_columns))
 
         # Handle cases where no numeric or categorical columns exist
         if numeric_columns.empty and categorical_columns.empty:
@@ -98,10 +160,10 @@ if uploaded_file is not None:
               x_axis = st.selectbox("X-axis (Categorical)", categorical_columns)
               y_axis = st.selectbox("Y-axis (Numeric)", numeric_columns) if not numeric_columns.empty else None
               if y_axis: #check if y-axis is selected (only numeric columns are present)
-                 chart = px.bar(df, x=x_axis, y=y_axis, title=f"{plot_type} of {y_axis} by {x_axis}")
+                 chart = px.bar(memo("bar", (x_axis, y_axis), lambda: reduce_bar(projected(x_axis, y_axis), x_axis, y_axis)), x=x_axis, y=y_axis, title=f"{plot_type} of {y_axis} by {x_axis}")
                  st.plotly_chart(chart)
               else:
-                  chart = px.bar(df, x=x_axis, title=f"{plot_type} of {x_axis}") #bar chart with just categorical
+                  chart = px.bar(memo("bar", (x_axis, None), lambda: reduce_bar(projected(x_axis), x_axis)), x=x_axis, y="count", title=f"{plot_type} of {x_axis}") #bar chart with just categorical
                   st.plotly_chart(chart)
 
 
@@ -112,14 +174,21 @@ if uploaded_file is not None:
            else:
               x_axis = st.selectbox("X-axis", numeric_columns)
               y_axis = st.selectbox("Y-axis", numeric_columns, index=1)
-              chart = px.scatter(df, x=x_axis, y=y_axis, title=f"{plot_type} of {y_axis} vs {x_axis}")
+              points, aggregated = memo("scatter", (x_axis, y_axis), lambda: reduce_scatter(projected(x_axis, y_axis), x_axis, y_axis))
+              if aggregated: # too many points to ship: draw the binned density instead
+                 chart = px.density_heatmap(points, x=x_axis, y=y_axis, z="count", histfunc="sum",
+                                            title=f"{plot_type} of {y_axis} vs {x_axis} (density of {dataset.n_rows:,} points)")
+              else:
+                 chart = px.scatter(points, x=x_axis, y=y_axis, title=f"{plot_type} of {y_axis} vs {x_axis}")
               st.plotly_chart(chart)
 
 
         elif plot_type == "Histogram":
             x_axis = st.selectbox("Column", numeric_columns)
             bins = st.slider("Number of bins", 5, 50, 10)
-            chart = px.histogram(df, x=x_axis, nbins=bins, title=f"{plot_type} of {x_axis}")
+            binned = memo("histogram", (x_axis, bins), lambda: reduce_histogram(projected(x_axis)[x_axis], bins)) # binned on the server, one bar per bin is sent
+            chart = px.bar(binned, x="bin_center", y="count", hover_data=["bin_start", "bin_end"], title=f"{plot_type} of {x_axis}")
+            chart.update_layout(bargap=0, xaxis_title=x_axis)
             st.plotly_chart(chart)
 
         elif plot_type == "Line Plot":
@@ -128,7 +197,7 @@ if uploaded_file is not None:
              else:
               x_axis = st.selectbox("X-axis (Time/Sequential)", numeric_columns)
               y_axis = st.selectbox("Y-axis", numeric_columns)
-              chart = px.line(df, x=x_axis, y=y_axis, title=f"{plot_type} of {y_axis} over {x_axis}")
+              chart = px.line(memo("line", (x_axis, y_axis), lambda: reduce_line(projected(x_axis, y_axis), x_axis, y_axis)), x=x_axis, y=y_axis, title=f"{plot_type} of {y_axis} over {x_axis}")
               st.plotly_chart(chart)
 
 
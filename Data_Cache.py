@@ -0,0 +1,79 @@
+import sys
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# Memory budget for memoized results; least recently used entries are evicted beyond it
+CACHE_BUDGET_BYTES = 256 * 1024 * 1024
+
+
+class ResultCache:
+    """
+    LRU memo of derived results (summary statistics, histograms, grouped aggregates, reduced
+    chart data, ...) keyed by (content hash of the upload, operation, parameters), bounded by
+    an estimate of the bytes held. Shared across Streamlit reruns and sessions, so switching
+    between plot types or back to an earlier choice does not rescan the data.
+    """
+
+    def __init__(self, max_bytes=CACHE_BUDGET_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict() # key -> (value, size)
+        self._lock = threading.Lock() # Streamlit runs each session in its own thread
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_or_compute(self, content_key, operation, params, compute):
+        """Returns the memoized result of compute() for this key, computing it on a miss."""
+        key = (content_key, operation, _freeze(params))
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+
+        value = compute()
+        size = estimate_size(value)
+        with self._lock:
+            if size <= self.max_bytes and key not in self._entries:
+                self._entries[key] = (value, size)
+                self.total_bytes += size
+                while self.total_bytes > self.max_bytes:
+                    _, (_, evicted_size) = self._entries.popitem(last=False)
+                    self.total_bytes -= evicted_size
+        return value
+
+    def invalidate(self, content_key):
+        """Drops every result derived from one upload."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == content_key]:
+                self.total_bytes -= self._entries.pop(key)[1]
+
+
+def estimate_size(value):
+    """Approximate number of bytes held by a cached result."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    return sys.getsizeof(value)
+
+
+def _freeze(params):
+    """Makes parameters hashable (lists become tuples, dicts sorted item tuples)."""
+    if isinstance(params, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in params.items()))
+    if isinstance(params, (list, tuple, pd.Index)):
+        return tuple(_freeze(p) for p in params)
+    return params
@@ -0,0 +1,127 @@
+import operator
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+COMPARISONS = {'==': operator.eq, '!=': operator.ne, '>': operator.gt, '>=': operator.ge, '<': operator.lt, '<=': operator.le}
+FILTER_OPS = list(COMPARISONS) + ['contains']
+# Row-position lists kept for recent (filters, sort) combinations, so paging through a result is O(page);
+# the same bound applies to the per-column sort orders
+QUERY_CACHE_ENTRIES = 16
+# Columns read from the dataset for sorting and filtering, kept for the most recently used ones
+COLUMN_CACHE_ENTRIES = 4
+
+
+class GridView:
+    """
+    Server-side row model for the data grid: answers (page, sort, filter) requests against a
+    spilled dataset (Data_Ingestion.SpilledDataset) and returns only the rows of the requested
+    page, so neither the server nor the browser holds the whole dataset: only the columns
+    being sorted or filtered on are read, and a page reads just the row groups it falls in.
+    Those columns, sort orders and filtered row positions are kept for the most recent ones.
+    One view is shared by every session (st.cache_resource), so the caches are guarded by a lock.
+    """
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self.columns = list(dataset.columns)
+        self._column_values = OrderedDict()
+        self._sort_orders = OrderedDict()
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.dataset.n_rows
+
+    def query(self, page=0, page_size=100, sort_by=None, ascending=True, filters=()):
+        """
+        Returns (page_df, matching_rows) for one page of the filtered, sorted rows.
+        filters is a sequence of (column, op, value) with op from FILTER_OPS.
+        """
+        positions = self._positions(sort_by, ascending, tuple(filters))
+        start = max(0, page) * page_size
+        page_df = self.dataset.take(positions[start:start + page_size])
+        return page_df, len(positions)
+
+    def count(self, sort_by=None, ascending=True, filters=()):
+        """Number of rows matching filters, without reading any page."""
+        return len(self._positions(sort_by, ascending, tuple(filters)))
+
+    def _positions(self, sort_by, ascending, filters):
+        key = (sort_by, ascending, filters)
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                return self._results[key]
+
+        mask = np.ones(len(self), dtype=bool)
+        for column, op, value in filters:
+            mask &= self._filter_mask(column, op, value)
+        if sort_by is None:
+            positions = np.flatnonzero(mask)
+        else:
+            order = self._sort_order(sort_by, ascending)
+            positions = order[mask[order]]
+
+        with self._lock:
+            _remember(self._results, key, positions)
+        return positions
+
+    def _sort_order(self, column, ascending):
+        """Stable row order for a column (missing values last), kept for recently sorted columns."""
+        key = (column, ascending)
+        with self._lock:
+            if key in self._sort_orders:
+                self._sort_orders.move_to_end(key)
+                return self._sort_orders[key]
+        values = self._column(column)
+        if pd.api.types.is_numeric_dtype(values):
+            keys = values.to_numpy(dtype=float, na_value=np.nan)
+            order = np.argsort(keys if ascending else -keys, kind='stable') # NaN sorts last
+        else:
+            order = values.sort_values(ascending=ascending, kind='stable', na_position='last').index.to_numpy()
+        with self._lock:
+            _remember(self._sort_orders, key, order)
+        return order
+
+    def _filter_mask(self, column, op, value):
+        if op not in FILTER_OPS:
+            raise ValueError(f"Unknown filter operator '{op}', expected one of {FILTER_OPS}.")
+        values = self._column(column)
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Evaluate the filter once per category and broadcast it through the codes
+            matched = _compare(pd.Series(values.cat.categories.astype(str)), op, str(value))
+            codes = values.cat.codes.to_numpy()
+            return np.where(codes >= 0, matched[codes], False)
+        if pd.api.types.is_numeric_dtype(values) and op != 'contains':
+            return _compare(values, op, float(value))
+        return _compare(values.astype(str).where(values.notna()), op, str(value))
+
+    def _column(self, column):
+        """One column of the dataset, read with column projection and kept for recently used columns."""
+        with self._lock:
+            if column in self._column_values:
+                self._column_values.move_to_end(column)
+                return self._column_values[column]
+        values = self.dataset.load([column])[column]
+        with self._lock:
+            _remember(self._column_values, column, values, COLUMN_CACHE_ENTRIES)
+        return values
+
+
+def _remember(cache, key, value, max_entries=QUERY_CACHE_ENTRIES):
+    """Adds key to an LRU OrderedDict, evicting the least recently used entries beyond max_entries."""
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > max_entries:
+        cache.popitem(last=False)
+
+
+def _compare(values, op, value):
+    """Boolean mask of values <op> value (missing values never match)."""
+    if op == 'contains':
+        result = values.str.contains(value, case=False, regex=False)
+    else:
+        result = COMPARISONS[op](values, value)
+    return result.to_numpy(dtype=bool, na_value=False) & values.notna().to_numpy()
@@ -0,0 +1,331 @@
+import hashlib
+import os
+import pickle
+import shutil
+import uuid
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Uploads are parsed in chunks of CHUNK_ROWS rows and spilled to Parquet part files under SPILL_DIR
+CHUNK_ROWS = 100_000
+SPILL_DIR = '.data_analysis_cache'
+# Spilled uploads kept on disk; the least recently used are evicted
+SPILL_ENTRIES = 8
+# Rows per Parquet row group: the unit read back when fetching individual rows
+ROW_GROUP_ROWS = 10_000
+# String columns with at most this many distinct values are loaded as categoricals
+CATEGORY_MAX_UNIQUE = 1000
+# Values kept per numeric column for approximate quantiles (exact below this many rows)
+QUANTILE_SAMPLE_SIZE = 100_000
+
+# Column kinds from narrowest to widest; a column's kind only ever widens while reading
+KINDS = ['int8', 'int16', 'int32', 'int64', 'float32', 'float64', 'string']
+ARROW_TYPES = {'bool': pa.bool_(), 'int8': pa.int8(), 'int16': pa.int16(), 'int32': pa.int32(),
+               'int64': pa.int64(), 'float32': pa.float32(), 'float64': pa.float64(), 'string': pa.string()}
+
+
+class RunningStats:
+    """
+    describe()-style summary statistics for numeric columns, updated one chunk at a time.
+    Count, mean, std, min and max are exact (merged with Chan's parallel variance formula);
+    quartiles come from a uniform reservoir sample and are exact until it overflows.
+    """
+
+    def __init__(self, sample_size=QUANTILE_SAMPLE_SIZE, seed=0):
+        self.sample_size = sample_size
+        self.rng = np.random.default_rng(seed)
+        self.columns = {}
+
+    def update(self, chunk):
+        for column in chunk.select_dtypes(include=["number"]).columns:
+            values = chunk[column].to_numpy(dtype=float, na_value=np.nan)
+            values = values[~np.isnan(values)]
+            if len(values) == 0:
+                continue
+            acc = self.columns.setdefault(column, {'count': 0, 'mean': 0.0, 'm2': 0.0, 'min': np.inf, 'max': -np.inf,
+                                                   'sample': np.empty(0), 'keys': np.empty(0)})
+            n, mean = len(values), values.mean()
+            m2 = ((values - mean) ** 2).sum()
+            total = acc['count'] + n
+            delta = mean - acc['mean']
+            acc['mean'] += delta * n / total
+            acc['m2'] += m2 + delta ** 2 * acc['count'] * n / total
+            acc['count'] = total
+            acc['min'], acc['max'] = min(acc['min'], values.min()), max(acc['max'], values.max())
+
+            # Reservoir: every value gets a random key and the sample_size smallest keys are kept
+            sample = np.concatenate([acc['sample'], values])
+            keys = np.concatenate([acc['keys'], self.rng.random(n)])
+            if len(sample) > self.sample_size:
+                keep = np.argpartition(keys, self.sample_size - 1)[:self.sample_size]
+                sample, keys = sample[keep], keys[keep]
+            acc['sample'], acc['keys'] = sample, keys
+
+    def describe(self, columns=None):
+        """Summary statistics in the layout of DataFrame.describe()."""
+        columns = [c for c in (columns if columns is not None else self.columns) if c in self.columns]
+        summary = {}
+        for column in columns:
+            acc = self.columns[column]
+            std = np.sqrt(acc['m2'] / (acc['count'] - 1)) if acc['count'] > 1 else np.nan
+            quartiles = np.percentile(acc['sample'], [25, 50, 75])
+            summary[column] = [acc['count'], acc['mean'], std, acc['min'], *quartiles, acc['max']]
+        return pd.DataFrame(summary, index=['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max'])
+
+
+class SpilledDataset:
+    """An uploaded file parsed into Parquet part files with narrowed column types."""
+
+    def __init__(self, path, kinds, has_nulls, category_columns, n_rows, stats):
+        self.path = path
+        self.kinds = kinds                       # column -> kind (see KINDS, or 'bool')
+        self.has_nulls = has_nulls               # column -> bool
+        self.category_columns = category_columns # low-cardinality string columns
+        self.n_rows = n_rows
+        self.stats = stats
+
+    @property
+    def columns(self):
+        return list(self.kinds)
+
+    @property
+    def shape(self):
+        return (self.n_rows, len(self.kinds))
+
+    @property
+    def numeric_columns(self):
+        return pd.Index([c for c, kind in self.kinds.items() if kind not in ('string', 'bool')])
+
+    @property
+    def categorical_columns(self):
+        return pd.Index([c for c, kind in self.kinds.items() if kind == 'string'])
+
+    def arrow_type(self, column):
+        kind = self.kinds[column]
+        if kind.startswith('int') and self.has_nulls[column]:
+            return pa.float64() # like pandas, integer columns with gaps become float
+        return ARROW_TYPES[kind]
+
+    def parts(self):
+        return sorted(os.path.join(self.path, name) for name in os.listdir(self.path) if name.endswith('.parquet'))
+
+    def iter_tables(self, columns=None):
+        """Yields the part files as Arrow tables cast to the final column types."""
+        columns = self.columns if columns is None else list(columns)
+        schema = pa.schema([(c, self.arrow_type(c)) for c in columns])
+        for part in self.parts():
+            yield pq.read_table(part, columns=columns).cast(schema)
+
+    def load(self, columns=None):
+        """Reads the dataset (or only some columns) into a DataFrame."""
+        columns = self.columns if columns is None else list(columns)
+        tables = list(self.iter_tables(columns))
+        return self._to_pandas(pa.concat_tables(tables) if tables else None, columns)
+
+    def take(self, positions, columns=None):
+        """
+        Rows at the given positions (in that order) as a DataFrame indexed by position.
+        Only the Parquet row groups holding those rows are read.
+        """
+        columns = self.columns if columns is None else list(columns)
+        positions = np.asarray(positions, dtype=np.int64)
+        groups, starts = self._row_groups()
+        group_of_row = np.searchsorted(starts, positions, side='right') - 1
+        schema = pa.schema([(c, self.arrow_type(c)) for c in columns])
+        pieces, order = [], []
+        for group in np.unique(group_of_row):
+            part, index = groups[group]
+            table = pq.ParquetFile(part).read_row_group(index, columns=columns).cast(schema)
+            selected = np.flatnonzero(group_of_row == group)
+            pieces.append(table.take(positions[selected] - starts[group]))
+            order.append(selected)
+        df = self._to_pandas(pa.concat_tables(pieces) if pieces else None, columns)
+        if order:
+            df = df.take(np.argsort(np.concatenate(order), kind='stable'))
+        df.index = positions
+        return df
+
+    def _row_groups(self):
+        """
+        [(part path, row group index), ...] in row order, and the first row of each. The spill
+        never changes once written, so the footers are read on first use only.
+        """
+        if getattr(self, '_row_group_index', None) is None:
+            groups, sizes = [], []
+            for part in self.parts():
+                metadata = pq.ParquetFile(part).metadata
+                for index in range(metadata.num_row_groups):
+                    groups.append((part, index))
+                    sizes.append(metadata.row_group(index).num_rows)
+            self._row_group_index = groups, np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+        return self._row_group_index
+
+    def _to_pandas(self, table, columns):
+        if table is not None:
+            df = table.to_pandas()
+        else:
+            df = pd.DataFrame({c: pd.Series(dtype=object) for c in columns})
+        categories = [c for c in columns if c in self.category_columns]
+        return df.astype({c: 'category' for c in categories}) if categories else df
+
+
+def ingest_upload(file, file_name, on_chunk=None, spill_dir=SPILL_DIR, chunk_rows=CHUNK_ROWS):
+    """
+    Parses a CSV or Excel upload in chunks of chunk_rows rows, narrowing column types as it
+    reads, spilling each chunk to Parquet and updating the summary statistics incrementally.
+    on_chunk(rows_read, stats) is called after every chunk so callers can show partial results.
+    The spill is keyed by the file's content hash and reused when the same file comes back;
+    it is written to a private directory that is renamed into place once complete, so
+    concurrent ingests of the same file never see or delete each other's parts.
+    """
+    key = _content_hash(file)
+    path = os.path.join(spill_dir, key)
+    if os.path.exists(os.path.join(path, 'dataset.pkl')):
+        return _open_spill(path, on_chunk)
+
+    extension = file_name.split('.')[-1].lower()
+    if extension == 'csv':
+        chunks = pd.read_csv(file, chunksize=chunk_rows)
+    elif extension == 'xlsx':
+        chunks = _iter_excel_chunks(file, chunk_rows)
+    else:
+        raise ValueError("Unsupported file format. Please upload a CSV or Excel file.")
+
+    work_path = f"{path}.tmp-{uuid.uuid4().hex}"
+    os.makedirs(work_path)
+    kinds, has_nulls, uniques, stats, n_rows = {}, {}, {}, RunningStats(), 0
+    for chunk_index, chunk in enumerate(chunks):
+        chunk = _narrow_chunk(chunk)
+        for column in chunk.columns:
+            kinds[column] = _widen(kinds.get(column), _kind_of(chunk[column]))
+            has_nulls[column] = has_nulls.get(column, False) or bool(chunk[column].isna().any())
+            if kinds[column] == 'string' and uniques.get(column, set()) is not None:
+                seen = uniques.setdefault(column, set())
+                seen.update(chunk[column].dropna().astype(str).unique())
+                if len(seen) > CATEGORY_MAX_UNIQUE:
+                    uniques[column] = None # too many distinct values, stop tracking
+        pq.write_table(pa.Table.from_pandas(chunk, preserve_index=False),
+                       os.path.join(work_path, f"part-{chunk_index:05d}.parquet"), row_group_size=ROW_GROUP_ROWS)
+        stats.update(chunk)
+        n_rows += len(chunk)
+        if on_chunk is not None:
+            on_chunk(n_rows, stats)
+
+    kinds = {c: kind or 'float64' for c, kind in kinds.items()} # all-empty columns
+    category_columns = [c for c, kind in kinds.items() if kind == 'string' and uniques.get(c) is not None]
+    dataset = SpilledDataset(path, kinds, has_nulls, category_columns, n_rows, stats)
+    with open(os.path.join(work_path, 'dataset.pkl'), 'wb') as f:
+        pickle.dump(dataset, f)
+    try:
+        os.rename(work_path, path)
+    except OSError: # another ingest of the same file finished first: use its spill
+        shutil.rmtree(work_path, ignore_errors=True)
+        return _open_spill(path)
+    _evict_spills(spill_dir, SPILL_ENTRIES)
+    return dataset
+
+
+def _open_spill(path, on_chunk=None):
+    """Reads a completed spill's metadata and marks it as recently used."""
+    meta_path = os.path.join(path, 'dataset.pkl')
+    os.utime(meta_path)
+    with open(meta_path, 'rb') as f:
+        dataset = pickle.load(f)
+    if on_chunk is not None:
+        on_chunk(dataset.n_rows, dataset.stats)
+    return dataset
+
+
+def _evict_spills(spill_dir, max_entries):
+    """Deletes all but the max_entries most recently used completed spills (in-progress ones are left alone)."""
+    meta_paths = [os.path.join(spill_dir, name, 'dataset.pkl') for name in os.listdir(spill_dir)]
+    meta_paths = [p for p in meta_paths if os.path.exists(p)]
+    for meta_path in sorted(meta_paths, key=os.path.getmtime, reverse=True)[max_entries:]:
+        shutil.rmtree(os.path.dirname(meta_path), ignore_errors=True)
+
+
+def _content_hash(file):
+    """sha256 of a file-like object (or path), leaving the stream at the start."""
+    digest = hashlib.sha256()
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+    file.seek(0)
+    for block in iter(lambda: file.read(1 << 20), b''):
+        digest.update(block)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def _iter_excel_chunks(file, chunk_rows):
+    """Streams the first sheet of an .xlsx file as DataFrames using openpyxl's read-only mode."""
+    from openpyxl import load_workbook
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    rows = workbook.worksheets[0].iter_rows(values_only=True)
+    header = [str(name) if name is not None else f"Unnamed: {i}" for i, name in enumerate(next(rows, []))]
+    batch = []
+    for row in rows:
+        batch.append(row[:len(header)])
+        if len(batch) == chunk_rows:
+            yield pd.DataFrame(batch, columns=header).infer_objects()
+            batch = []
+    if batch:
+        yield pd.DataFrame(batch, columns=header).infer_objects()
+    workbook.close()
+
+
+def _narrow_chunk(chunk):
+    """Converts numeric-looking text to numbers and downcasts numbers to the narrowest lossless type."""
+    narrowed = {}
+    for column in chunk.columns:
+        values = chunk[column]
+        if values.dtype == bool:
+            narrowed[column] = values
+            continue
+        if not pd.api.types.is_numeric_dtype(values):
+            numeric = pd.to_numeric(values, errors='coerce')
+            if values.notna().any() and numeric.notna().sum() == values.notna().sum():
+                values = numeric
+            else:
+                narrowed[column] = values.where(values.isna(), values.astype(str)).astype(object)
+                continue
+        if values.isna().all():
+            narrowed[column] = values.astype('float64')
+            continue
+        if pd.api.types.is_float_dtype(values):
+            finite = values.dropna()
+            if (finite == np.round(finite)).all() and finite.abs().max() < 2 ** 53:
+                values = values.astype('Int64') # integral floats (gaps are tracked separately)
+            else:
+                as_float32 = values.astype('float32')
+                lossless = (as_float32.astype('float64') == values) | values.isna()
+                narrowed[column] = as_float32 if lossless.all() else values
+                continue
+        narrowed[column] = pd.to_numeric(values, downcast='integer')
+    return pd.DataFrame(narrowed, index=chunk.index)
+
+
+def _kind_of(values):
+    if values.isna().all():
+        return None # carries no type information
+    dtype = str(values.dtype).lower()
+    if dtype in KINDS or dtype == 'bool':
+        return dtype
+    return 'string'
+
+
+def _widen(current, new):
+    """The narrowest kind that can hold values of both kinds."""
+    if current is None or new is None:
+        return current or new
+    if current == new:
+        return current
+    if 'bool' in (current, new):
+        return 'string'
+    if {current, new} & {'float32'} and {current, new} & {'int32', 'int64'}:
+        return 'float64' # float32 cannot hold every int32/int64 exactly
+    return max(current, new, key=KINDS.index)
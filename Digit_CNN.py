@@ -0,0 +1,257 @@
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+import tensorflow as tf
+from tensorflow import keras
+from tensorflow.keras import layers, models
+from tensorflow.keras.datasets import mnist
+from Image_Pipeline import ThroughputCallback, make_dataset
+
+OPTIMIZERS = ['adam', 'sgd', 'rmsprop', 'adagrad', 'nadam']
+# Keras dtype policies: bfloat16 is the mixed-precision type with CPU support
+PRECISIONS = ['float32', 'mixed_bfloat16']
+BENCHMARK_DIR = 'benchmarks'
+# Samples/sec drop (relative to the baseline run) reported as a regression by compare_results
+REGRESSION_THRESHOLD = 0.10
+
+
+def load_mnist():
+    """MNIST as uint8 (n, 28, 28, 1) images and integer labels: (train_images, train_labels), (test_images, test_labels)."""
+    (train_images, train_labels), (test_images, test_labels) = mnist.load_data()
+    return (train_images[..., None], train_labels), (test_images[..., None], test_labels)
+
+
+def build_lenet5():
+    """LeNet-5 style CNN from the notebooks."""
+    return models.Sequential([
+        layers.Input(shape=(28, 28, 1)),
+        layers.Conv2D(6, (5, 5), activation='relu'),
+        layers.MaxPooling2D((2, 2)),
+        layers.Conv2D(16, (5, 5), activation='relu'),
+        layers.MaxPooling2D((2, 2)),
+        layers.Flatten(),
+        layers.Dense(120, activation='relu'),
+        layers.Dense(84, activation='relu'),
+        layers.Dense(10, activation='softmax', dtype='float32') # float32 output under mixed precision too
+    ])
+
+
+def build_cnn():
+    """The notebooks' second model: three convolution blocks with dropout."""
+    return models.Sequential([
+        layers.Input(shape=(28, 28, 1)),
+        layers.Conv2D(32, (3, 3), activation='relu'),
+        layers.MaxPooling2D((2, 2)),
+        layers.Dropout(0.25),
+        layers.Conv2D(64, (3, 3), activation='relu'),
+        layers.MaxPooling2D((2, 2)),
+        layers.Dropout(0.25),
+        layers.Conv2D(64, (3, 3), activation='relu'),
+        layers.Flatten(),
+        layers.Dropout(0.5),
+        layers.Dense(64, activation='relu'),
+        layers.Dense(10, activation='softmax', dtype='float32') # float32 output under mixed precision too
+    ])
+
+
+def build_batchnorm_cnn():
+    """The notebooks' third model: wider convolution blocks with batch normalization."""
+    return models.Sequential([
+        layers.Input(shape=(28, 28, 1)),
+        layers.Conv2D(32, (3, 3), activation='relu'),
+        layers.MaxPooling2D((2, 2)),
+        layers.BatchNormalization(),
+        layers.Conv2D(64, (3, 3), activation='relu'),
+        layers.MaxPooling2D((2, 2)),
+        layers.BatchNormalization(),
+        layers.Conv2D(128, (3, 3), activation='relu'),
+        layers.Flatten(),
+        layers.Dropout(0.5),
+        layers.Dense(128, activation='relu'),
+        layers.BatchNormalization(),
+        layers.Dense(10, activation='softmax', dtype='float32') # float32 output under mixed precision too
+    ])
+
+
+MODELS = {'lenet5': build_lenet5, 'cnn': build_cnn, 'batchnorm_cnn': build_batchnorm_cnn}
+
+
+def configure_threads(intra_op=0, inter_op=0):
+    """
+    Sets TensorFlow's intra-/inter-op thread pools (0 = TensorFlow's default). Changing them
+    only works before any TF op runs; settings that already hold are left alone.
+    """
+    if tf.config.threading.get_intra_op_parallelism_threads() != intra_op:
+        tf.config.threading.set_intra_op_parallelism_threads(intra_op)
+    if tf.config.threading.get_inter_op_parallelism_threads() != inter_op:
+        tf.config.threading.set_inter_op_parallelism_threads(inter_op)
+
+
+def train_model(model_name='cnn', optimizer='adam', batch_size=64, epochs=10, xla=False, precision='float32',
+                train_samples=None, callbacks=(), data=None, seed=42):
+    """
+    Builds, compiles and trains one of MODELS on MNIST through the uint8 tf.data pipeline,
+    validating on the test set as the notebooks do. Returns (model, history).
+    """
+    tf.keras.utils.set_random_seed(seed)
+    keras.mixed_precision.set_global_policy(precision)
+    (train_images, train_labels), (test_images, test_labels) = data or load_mnist()
+    if train_samples:
+        train_images, train_labels = train_images[:train_samples], train_labels[:train_samples]
+
+    model = MODELS[model_name]()
+    model.compile(optimizer=optimizer, loss='sparse_categorical_crossentropy', metrics=['accuracy'], jit_compile=xla)
+    train_ds = make_dataset(train_images, train_labels, batch_size=batch_size, shuffle=True, seed=seed)
+    valid_ds = make_dataset(test_images, test_labels, batch_size=1024)
+    history = model.fit(train_ds, epochs=epochs, validation_data=valid_ds, verbose=0, callbacks=list(callbacks))
+    return model, history
+
+
+class TimeToAccuracy(keras.callbacks.Callback):
+    """Records the training time until val_accuracy first reaches target (seconds stays None if it never does)."""
+
+    def __init__(self, target):
+        super().__init__()
+        self.target = target
+        self.seconds = None
+        self.epoch = None
+
+    def on_train_begin(self, logs=None):
+        self._start = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        if self.seconds is None and (logs or {}).get('val_accuracy', 0) >= self.target:
+            self.seconds, self.epoch = time.perf_counter() - self._start, epoch + 1
+
+
+def benchmark_config(config):
+    """
+    Trains one configuration and returns its measurements: wall time, mean samples/sec over
+    the epochs after the first (which includes tracing/compilation), peak RSS, time to
+    target accuracy and the final validation accuracy. Meant to run in a fresh process.
+    """
+    configure_threads(config['intra_op_threads'], config['inter_op_threads'])
+    data = load_mnist()
+    n_train = config['train_samples'] or len(data[0][1])
+    throughput = ThroughputCallback(n_train)
+    target = TimeToAccuracy(config['target_accuracy'])
+    start = time.perf_counter()
+    _, history = train_model(config['model'], config['optimizer'], config['batch_size'], config['epochs'],
+                             config['xla'], config['precision'], config['train_samples'], [target, throughput], data)
+    wall = time.perf_counter() - start
+
+    steady = throughput.epochs[1:] or throughput.epochs
+    return {**config,
+            'wall_seconds': wall,
+            'first_epoch_seconds': throughput.epochs[0]['seconds'],
+            'samples_per_sec': sum(e['samples_per_sec'] for e in steady) / len(steady),
+            'cpu_percent': sum(e['cpu_percent'] for e in steady) / len(steady),
+            'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, # KiB on Linux
+            'time_to_target_seconds': target.seconds,
+            'epochs_to_target': target.epoch,
+            'tensorflow_version': tf.__version__,
+            'final_val_accuracy': history.history['val_accuracy'][-1]}
+
+
+def benchmark_grid(models=('cnn',), optimizers=('adam',), batch_sizes=(64,), threads=((0, 0),), xla=(False,),
+                   precisions=('float32',), epochs=3, target_accuracy=0.98, train_samples=None):
+    """Every combination of the given settings, as benchmark configurations."""
+    return [{'model': m, 'optimizer': o, 'batch_size': b, 'intra_op_threads': t[0], 'inter_op_threads': t[1],
+             'xla': x, 'precision': p, 'epochs': epochs, 'target_accuracy': target_accuracy, 'train_samples': train_samples}
+            for m, o, b, t, x, p in itertools.product(models, optimizers, batch_sizes, threads, xla, precisions)]
+
+
+def run_benchmark(configs, out_prefix, on_result=None):
+    """
+    Runs each configuration in its own process, one at a time (so runs do not compete for
+    cores and peak RSS is per configuration), and writes out_prefix.json and out_prefix.csv.
+    """
+    context = multiprocessing.get_context('spawn')
+    results = []
+    with ProcessPoolExecutor(max_workers=1, mp_context=context, max_tasks_per_child=1) as pool:
+        for result in pool.map(benchmark_config, configs):
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+    write_results(results, out_prefix)
+    return results
+
+
+def write_results(results, out_prefix):
+    """Writes benchmark rows as JSON (with the machine they ran on) and as CSV."""
+    os.makedirs(os.path.dirname(out_prefix) or '.', exist_ok=True)
+    machine = {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(),
+               'platform': platform.platform(), 'cpu_count': os.cpu_count()}
+    with open(f"{out_prefix}.json", 'w') as f:
+        json.dump({'machine': machine, 'results': results}, f, indent=2)
+    with open(f"{out_prefix}.csv", 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(results[0]) if results else [])
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def compare_results(baseline_path, current_path, threshold=REGRESSION_THRESHOLD):
+    """
+    Matches the configurations of two JSON result files and returns rows with the relative
+    change in samples/sec and wall time; a samples/sec drop beyond threshold is a regression.
+    """
+    setting_keys = ['model', 'optimizer', 'batch_size', 'intra_op_threads', 'inter_op_threads', 'xla',
+                    'precision', 'epochs', 'train_samples']
+    def by_config(path):
+        with open(path) as f:
+            return {tuple(r[k] for k in setting_keys): r for r in json.load(f)['results']}
+    baseline, current = by_config(baseline_path), by_config(current_path)
+    rows = []
+    for key in baseline.keys() & current.keys():
+        old, new = baseline[key], current[key]
+        change = new['samples_per_sec'] / old['samples_per_sec'] - 1
+        rows.append({**dict(zip(setting_keys, key)), 'samples_per_sec_change': change,
+                     'wall_seconds_change': new['wall_seconds'] / old['wall_seconds'] - 1,
+                     'regression': change < -threshold})
+    return sorted(rows, key=lambda r: r['samples_per_sec_change'])
+
+
+def _thread_setting(value):
+    intra, _, inter = value.partition(':')
+    return int(intra), int(inter or 0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark MNIST CNN training on CPU across optimizers, batch sizes, threads and XLA.")
+    parser.add_argument("--models", nargs="+", default=["cnn"], choices=list(MODELS))
+    parser.add_argument("--optimizers", nargs="+", default=OPTIMIZERS)
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[64])
+    parser.add_argument("--threads", nargs="+", type=_thread_setting, default=[(0, 0)],
+                        help="intra:inter thread counts, 0 = TensorFlow default (e.g. 1:1 4:2 0:0)")
+    parser.add_argument("--xla", nargs="+", choices=["off", "on"], default=["off"])
+    parser.add_argument("--precisions", nargs="+", choices=PRECISIONS, default=["float32"])
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--target-accuracy", type=float, default=0.98)
+    parser.add_argument("--train-samples", type=int, help="Train on the first N images only (quick runs)")
+    parser.add_argument("--out", default=os.path.join(BENCHMARK_DIR, time.strftime('digit_cnn_%Y%m%d_%H%M%S')),
+                        help="Output path prefix for the .json and .csv results")
+    parser.add_argument("--baseline", help="Earlier results .json to compare against")
+    args = parser.parse_args()
+
+    configs = benchmark_grid(args.models, args.optimizers, args.batch_sizes, args.threads,
+                             [x == "on" for x in args.xla], args.precisions, args.epochs, args.target_accuracy, args.train_samples)
+    print(f"Running {len(configs)} configurations...")
+    run_benchmark(configs, args.out, on_result=lambda r: print(
+        f"{r['model']} {r['optimizer']} batch={r['batch_size']} threads={r['intra_op_threads']}:{r['inter_op_threads']} "
+        f"xla={r['xla']} {r['precision']}: {r['samples_per_sec']:,.0f} samples/s, {r['wall_seconds']:.1f}s, "
+        f"{r['peak_rss_mb']:.0f} MB, val_acc={r['final_val_accuracy']:.4f}, to target={r['time_to_target_seconds']}"))
+    print(f"Wrote {args.out}.json and {args.out}.csv")
+
+    if args.baseline:
+        for row in compare_results(args.baseline, f"{args.out}.json"):
+            flag = "REGRESSION" if row['regression'] else ""
+            print(f"{row['model']} {row['optimizer']} batch={row['batch_size']} "
+                  f"threads={row['intra_op_threads']}:{row['inter_op_threads']} xla={row['xla']} {row['precision']}: "
+                  f"{row['samples_per_sec_change']:+.1%} samples/s, {row['wall_seconds_change']:+.1%} wall {flag}")
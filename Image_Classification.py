@@ -1,47 +1,110 @@
 import streamlit as st
-import tensorflow as tf
-from tensorflow import keras
 import numpy as np
-import matplotlib.pyplot as plt
-from io import BytesIO
+import os
+import threading
+import pandas as pd
+from Image_Pipeline import SHARD_DIR, ThroughputCallback, make_dataset, normalize, shard_count, sharded_dataset, write_shards
+from Image_Models import MODEL_REGISTRY_DIR, build_model, compile_model, data_hash, load_weights, model_key, save_weights
+from Image_Inference import MicroBatcher, TFLiteClassifier, export_tflite
+from Image_Rendering import CORRECT_COLOR, WRONG_COLOR, encode_png, montage, upscale
 
-# Load the Fashion MNIST dataset
-fashion = keras.datasets.fashion_mnist
-(xtrain, ytrain), (xtest, ytest) = fashion.load_data()
+# Images stay uint8; the input pipeline normalizes each batch to float32 on the fly
+BATCH_SIZE = 32
+EPOCHS = 10
+OPTIMIZER = "adam"
 
-# Normalize the data
-xtrain, xtest = xtrain / 255.0, xtest / 255.0
+# Load the Fashion MNIST dataset once per server process, on first use
+@st.cache_resource
+def get_dataset():
+    """(xtrain, ytrain), (xtest, ytest) as uint8 arrays, plus the training data hash."""
+    from tensorflow import keras
+    fashion = keras.datasets.fashion_mnist
+    (xtrain, ytrain), (xtest, ytest) = fashion.load_data()
+    return (xtrain, ytrain), (xtest, ytest), data_hash(xtrain, ytrain)
+
+# Build the model once and restore the trained weights from the registry when it has them
+@st.cache_resource
+def get_model(train_digest):
+    """
+    A dict with the compiled model, its registry key, its training history (None while
+    untrained) and the lock under which a retrained model replaces model and history.
+    """
+    model = compile_model(build_model(), OPTIMIZER)
+    key = model_key(model, train_digest, optimizer=OPTIMIZER, epochs=EPOCHS, batch_size=BATCH_SIZE)
+    return {'model': model, 'key': key, 'history': load_weights(model, key), 'lock': threading.Lock()}
+
+# TFLite exports of the registry weights, each served through one micro-batching queue shared by all sessions
+@st.cache_resource
+def get_tflite_batchers():
+    """{(key, quantize): MicroBatcher}, and the lock that guards it."""
+    return {'batchers': {}, 'lock': threading.Lock()}
+
+def get_tflite_batcher(key, quantize, model, calibration_images):
+    state = get_tflite_batchers()
+    with state['lock']:
+        if (key, quantize) not in state['batchers']:
+            path = os.path.join(MODEL_REGISTRY_DIR, f"{key}{'.int8' if quantize else ''}.tflite")
+            if not os.path.exists(path):
+                export_tflite(model, path, quantize, calibration_images)
+            state['batchers'][key, quantize] = MicroBatcher(TFLiteClassifier(path).predict)
+        return state['batchers'][key, quantize]
+
+def close_tflite_batchers():
+    """Stops every batcher's worker thread and forgets them: their exports are of the old weights."""
+    state = get_tflite_batchers()
+    with state['lock']:
+        for batcher in state['batchers'].values():
+            batcher.close()
+        state['batchers'].clear()
+
+(xtrain, ytrain), (xtest, ytest), train_digest = get_dataset()
+state = get_model(train_digest)
+model = state['model']
+
+# PNG bytes of one dataset image, encoded straight from uint8 and memoized by (split, index)
+@st.cache_data(max_entries=10_000)
+def image_png(split, index, scale=8):
+    images = xtrain if split == "train" else xtest
+    return encode_png(upscale(images[index], scale))
+
+# PNG bytes of a montage of test images, each framed green (correct) or red (wrong)
+@st.cache_data(max_entries=64)
+def prediction_montage_png(indices, correct, columns=10):
+    colors = [CORRECT_COLOR if ok else WRONG_COLOR for ok in correct]
+    return encode_png(montage(xtest[list(indices)], columns=min(columns, len(indices)), border_colors=colors, scale=3))
 
 # Function to display an image
-def display_image(image, label):
+def display_image(split, index, label):
+    st.image(image_png(split, index), caption=f"Label: {label}", use_column_width=True)
+
+# Function to plot the accuracy curves of a training run
+def plot_history(history):
+    import matplotlib.pyplot as plt # only needed once there is a history to plot
+    st.write("### Training History")
     fig, ax = plt.subplots()
-    ax.imshow(image, cmap='gray')
-    ax.axis('off')
-    ax.set_title(f"Label: {label}")
-    buf = BytesIO()
-    plt.savefig(buf, format="png")
-    st.image(buf, use_column_width=True)
-    plt.close()
+    ax.plot(history['accuracy'], label='Train Accuracy')
+    ax.plot(history['val_accuracy'], label='Validation Accuracy')
+    ax.set_xlabel('Epochs')
+    ax.set_ylabel('Accuracy')
+    ax.legend()
+    st.pyplot(fig)
 
 # Sidebar: Select an image index
 imgIndex = st.sidebar.slider("Select Image Index", 0, len(xtrain) - 1, 4)
 
 # Display the selected image
 st.write("### Selected Image from Training Dataset")
-display_image(xtrain[imgIndex], ytrain[imgIndex])
+display_image("train", imgIndex, ytrain[imgIndex])
 
 # Display dataset shapes
 st.write("### Dataset Shapes")
 st.write(f"Training Data Shape: {xtrain.shape}")
 st.write(f"Testing Data Shape: {xtest.shape}")
 
-# Define the model
-model = keras.models.Sequential([
-    keras.layers.Flatten(input_shape=[28, 28]),
-    keras.layers.Dense(300, activation="relu"),
-    keras.layers.Dense(100, activation="relu"),
-    keras.layers.Dense(10, activation="softmax")
-])
+if state['history'] is None:
+    st.info("No trained weights in the model registry yet: train the model before predicting.")
+else:
+    st.success("Loaded trained weights from the model registry.")
 
 # Display model summary
 st.write("### Model Summary")
@@ -50,36 +113,68 @@ with st.expander("Click to view model summary"):
     model.summary(print_fn=lambda x: model_summary.append(x))
     st.text("\n".join(model_summary))
 
+# Input pipeline: in-memory tf.data, or streamed from shards on disk (for image sets larger than memory)
+input_mode = st.sidebar.selectbox("Training input", ["In memory", "TFRecord shards", "Memmap shards"])
+
 # Train the model
 if st.button("Train the Model"):
-    xvalid, train = xtrain[:5000], xtrain[5000:]
-    yvalid, ytrain = ytrain[:5000], ytrain[5000:]
-
-    model.compile(loss="sparse_categorical_crossentropy",
-                  optimizer="adam",
-                  metrics=["accuracy"])
+    xvalid, xtrain_split = xtrain[:5000], xtrain[5000:]
+    yvalid, ytrain_split = ytrain[:5000], ytrain[5000:]
+    valid_ds = make_dataset(xvalid, yvalid, batch_size=256)
+    if input_mode == "In memory":
+        train_ds = make_dataset(xtrain_split, ytrain_split, batch_size=BATCH_SIZE, shuffle=True)
+        n_train = len(xtrain_split)
+    else:
+        fmt = "tfrecord" if input_mode == "TFRecord shards" else "memmap"
+        shard_dir = os.path.join(SHARD_DIR, f"fashion_mnist_train_{fmt}")
+        if not os.path.exists(os.path.join(shard_dir, "shards.json")):
+            with st.spinner("Writing training shards..."):
+                write_shards(xtrain_split, ytrain_split, shard_dir, fmt=fmt)
+        train_ds = sharded_dataset(shard_dir, batch_size=BATCH_SIZE, shuffle=True)
+        n_train = shard_count(shard_dir)
 
     st.write("Training in progress...")
-    history = model.fit(train, ytrain, epochs=10, validation_data=(xvalid, yvalid), verbose=0)
+    epoch_status = st.empty()
+    throughput = ThroughputCallback(n_train, on_epoch=lambda r: epoch_status.write(
+        f"Epoch {r['epoch']}: {r['samples_per_sec']:,.0f} samples/sec, CPU {r['cpu_percent']:.0f}%"))
+    # A fresh model, so the weights are exactly EPOCHS epochs on this data (as the registry key says)
+    # and the shared model keeps serving other sessions until training is done
+    trained = compile_model(build_model(), OPTIMIZER)
+    history = trained.fit(train_ds, epochs=EPOCHS, validation_data=valid_ds, verbose=0, callbacks=[throughput])
+    epoch_status.empty()
     st.write("### Training Complete")
+    st.write("### Input Pipeline Throughput")
+    st.dataframe(pd.DataFrame(throughput.epochs).set_index("epoch"))
+
+    # Keep the trained weights for later reruns and server restarts, then serve them
+    trained_history = {k: [float(v) for v in values] for k, values in history.history.items()}
+    with state['lock']:
+        save_weights(trained, state['key'], trained_history)
+        state['model'], state['history'] = trained, trained_history
+        close_tflite_batchers() # exports of the old weights are stale
+    model = trained
 
     # Plot training history
-    st.write("### Training History")
-    fig, ax = plt.subplots()
-    ax.plot(history.history['accuracy'], label='Train Accuracy')
-    ax.plot(history.history['val_accuracy'], label='Validation Accuracy')
-    ax.set_xlabel('Epochs')
-    ax.set_ylabel('Accuracy')
-    ax.legend()
-    st.pyplot(fig)
+    plot_history(trained_history)
+elif state['history']:
+    with st.expander("Training history of the registry model"):
+        plot_history(state['history'])
 
 # Make predictions
+inference_backend = st.sidebar.selectbox("Inference backend", ["Keras", "TFLite", "TFLite (int8)"])
+n_predict = st.sidebar.slider("Test images to predict", 1, 100, 5)
 if st.button("Predict on Test Images"):
-    new = xtest[:5]
-    predictions = model.predict(new)
+    new = xtest[:n_predict]
+    if inference_backend == "Keras":
+        predictions = model(normalize(new), training=False).numpy() # a direct call: no predict() setup for 5 images
+    else:
+        batcher = get_tflite_batcher(state['key'], inference_backend == "TFLite (int8)", model, xtrain)
+        predictions = np.stack([f.result() for f in [batcher.submit(image) for image in new]])
 
     st.write("### Predictions")
     predicted_classes = np.argmax(predictions, axis=1)
-    for i, pred in enumerate(predicted_classes):
-        st.write(f"Image {i+1}: Predicted Label = {pred}, True Label = {ytest[i]}")
-        display_image(new[i], ytest[i])
+    correct = predicted_classes == ytest[:n_predict]
+    st.image(prediction_montage_png(tuple(range(n_predict)), tuple(correct.tolist())),
+             caption=f"{correct.sum()} of {n_predict} correct (green: correct, red: wrong)")
+    st.dataframe(pd.DataFrame({"Image": np.arange(1, n_predict + 1), "Predicted Label": predicted_classes,
+                               "True Label": ytest[:n_predict]}).set_index("Image"))
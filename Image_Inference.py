@@ -0,0 +1,232 @@
+import argparse
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+import numpy as np
+import tensorflow as tf
+from Image_Models import MODEL_REGISTRY_DIR, build_model
+
+# Micro-batching defaults: the largest batch, and how long the oldest request may wait for it to fill
+MAX_BATCH_SIZE = 32
+MAX_LATENCY_MS = 5.0
+
+
+def export_tflite(model, path, quantize=False, representative_images=None):
+    """
+    Converts a Keras model to a TFLite flatbuffer at path. With quantize=True weights and
+    activations are int8 (calibrated on representative_images, uint8 like the inputs); the
+    model still takes and returns float32, so it is a drop-in replacement.
+    """
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantize:
+        if representative_images is None:
+            raise ValueError("int8 quantization needs representative_images for calibration.")
+        def representative_dataset():
+            for image in representative_images[:500]:
+                yield [_normalize(image[None])]
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset
+    flatbuffer = converter.convert()
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(flatbuffer)
+    return path
+
+
+class TFLiteClassifier:
+    """
+    Runs an exported TFLite classifier on uint8 images. Batches are zero-padded to the next
+    power of two and each padded size keeps its own allocated interpreter, so varying batch
+    sizes (as a MicroBatcher produces) never resize and reallocate tensors after warm-up.
+    Not thread-safe: use one per thread, or a MicroBatcher.
+    """
+
+    def __init__(self, path, num_threads=None):
+        self.path = path
+        self.num_threads = num_threads
+        self.interpreters = {} # padded batch size -> (interpreter, input index, output index)
+
+    def predict(self, images):
+        """Class probabilities for a (batch, 28, 28) uint8 array."""
+        images = _normalize(images)
+        n = len(images)
+        size = 1 << max(0, n - 1).bit_length()
+        interpreter, input_index, output_index = self.interpreters.get(size) or self._allocate(size, images.shape[1:])
+        if n < size:
+            images = np.concatenate([images, np.zeros((size - n, *images.shape[1:]), np.float32)])
+        interpreter.set_tensor(input_index, images)
+        interpreter.invoke()
+        return interpreter.get_tensor(output_index)[:n].copy()
+
+    def _allocate(self, size, image_shape):
+        interpreter = tf.lite.Interpreter(model_path=self.path, num_threads=self.num_threads)
+        input_index = interpreter.get_input_details()[0]['index']
+        interpreter.resize_tensor_input(input_index, (size, *image_shape))
+        interpreter.allocate_tensors()
+        self.interpreters[size] = (interpreter, input_index, interpreter.get_output_details()[0]['index'])
+        return self.interpreters[size]
+
+
+class MicroBatcher:
+    """
+    In-process micro-batching queue: concurrent submit() calls are collected by one worker
+    thread into batches of up to max_batch_size images, flushed when full or when the
+    oldest request has waited max_latency_ms, and answered through futures. close() answers
+    the requests already queued and stops the worker; later submit() calls raise.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=MAX_BATCH_SIZE, max_latency_ms=MAX_LATENCY_MS):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency_ms / 1000
+        self.batch_sizes = [] # size of every batch run, for reporting
+        self._requests = queue.Queue()
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def submit(self, image):
+        """Queues one image; the returned future resolves to its class probabilities."""
+        future = Future()
+        with self._close_lock:
+            if self._closed:
+                raise RuntimeError("MicroBatcher is closed.")
+            self._requests.put((image, future))
+        return future
+
+    def predict(self, image):
+        return self.submit(image).result()
+
+    def close(self):
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._requests.put(None)
+        self._worker.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _run(self):
+        while True:
+            request = self._requests.get()
+            if request is None:
+                return
+            batch = [request]
+            deadline = time.perf_counter() + self.max_latency
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    request = self._requests.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if request is None:
+                    self._requests.put(None) # finish this batch, then stop
+                    break
+                batch.append(request)
+
+            images = np.stack([image for image, _ in batch])
+            try:
+                predictions = self.predict_fn(images)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batch_sizes.append(len(batch))
+            for (_, future), prediction in zip(batch, predictions):
+                future.set_result(prediction)
+
+
+def benchmark_inference(predict_fn, images, n_requests=2000, concurrency=16,
+                        max_batch_size=MAX_BATCH_SIZE, max_latency_ms=MAX_LATENCY_MS):
+    """
+    Serves n_requests single-image requests two ways: one predict_fn call per image, and
+    concurrency client threads going through a MicroBatcher. Returns one row per mode with
+    p50/p99 request latency (ms) and throughput (images/sec).
+    """
+    requests = [images[i % len(images)] for i in range(n_requests)]
+    predict_fn(images[:1]) # warm up
+
+    latencies = []
+    start = time.perf_counter()
+    for image in requests:
+        t0 = time.perf_counter()
+        predict_fn(image[None])
+        latencies.append(time.perf_counter() - t0)
+    rows = [_latency_row('per-image', latencies, time.perf_counter() - start, 1.0)]
+
+    latencies = [0.0] * n_requests
+    with MicroBatcher(predict_fn, max_batch_size, max_latency_ms) as batcher:
+        def client(worker):
+            for i in range(worker, n_requests, concurrency):
+                t0 = time.perf_counter()
+                batcher.predict(requests[i])
+                latencies[i] = time.perf_counter() - t0
+        threads = [threading.Thread(target=client, args=(w,)) for w in range(concurrency)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - start
+    rows.append(_latency_row(f'micro-batched (max {max_batch_size}, {max_latency_ms:g} ms, {concurrency} clients)',
+                             latencies, wall, float(np.mean(batcher.batch_sizes))))
+    return rows
+
+
+def _latency_row(mode, latencies, wall, mean_batch):
+    latencies = np.asarray(latencies) * 1000
+    return {'mode': mode, 'requests': len(latencies), 'p50_ms': float(np.percentile(latencies, 50)),
+            'p99_ms': float(np.percentile(latencies, 99)), 'images_per_sec': len(latencies) / wall,
+            'mean_batch': mean_batch}
+
+
+def _normalize(images):
+    return np.asarray(images, dtype=np.float32) / 255.0
+
+
+def _latest_weights(registry_dir=MODEL_REGISTRY_DIR):
+    """The most recently used weights file in the registry, or None."""
+    if not os.path.isdir(registry_dir):
+        return None
+    paths = [os.path.join(registry_dir, name) for name in os.listdir(registry_dir)
+             if name.endswith('.weights.h5') and '.tmp.' not in name]
+    return max(paths, key=os.path.getmtime) if paths else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the Fashion-MNIST classifier to TFLite and benchmark CPU inference.")
+    parser.add_argument("--weights", help="Keras weights file (default: the most recent in the model registry)")
+    parser.add_argument("--int8", action="store_true", help="Quantize weights and activations to int8")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--max-batch-size", type=int, default=MAX_BATCH_SIZE)
+    parser.add_argument("--max-latency-ms", type=float, default=MAX_LATENCY_MS)
+    args = parser.parse_args()
+
+    (_, _), (xtest, _) = tf.keras.datasets.fashion_mnist.load_data()
+    model = build_model()
+    weights = args.weights or _latest_weights()
+    if weights:
+        model.load_weights(weights)
+    else:
+        print("No trained weights found; benchmarking an untrained model (latency is unaffected).")
+    base = weights[:-len('.weights.h5')] if weights else os.path.join(MODEL_REGISTRY_DIR, 'untrained')
+    path = export_tflite(model, f"{base}{'.int8' if args.int8 else ''}.tflite", args.int8, xtest)
+    print(f"Exported {path} ({os.path.getsize(path) / 1024:.0f} KiB)")
+
+    classifier = TFLiteClassifier(path)
+    rows = benchmark_inference(classifier.predict, xtest, args.requests, args.concurrency,
+                               args.max_batch_size, args.max_latency_ms)
+    print(f"{'mode':<60} {'p50 ms':>8} {'p99 ms':>8} {'images/s':>10} {'batch':>6}")
+    for row in rows:
+        print(f"{row['mode']:<60} {row['p50_ms']:>8.2f} {row['p99_ms']:>8.2f} {row['images_per_sec']:>10.0f} {row['mean_batch']:>6.1f}")
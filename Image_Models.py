@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+import numpy as np
+from tensorflow import keras
+
+# Trained weights are saved under MODEL_REGISTRY_DIR, keyed by a hash of architecture, data and training settings
+MODEL_REGISTRY_DIR = '.image_model_registry'
+MODEL_REGISTRY_ENTRIES = 8
+
+
+def build_model():
+    """The Fashion-MNIST classifier: a small fully connected network over 28x28 images."""
+    return keras.models.Sequential([
+        keras.layers.Input(shape=[28, 28]),
+        keras.layers.Flatten(),
+        keras.layers.Dense(300, activation="relu"),
+        keras.layers.Dense(100, activation="relu"),
+        keras.layers.Dense(10, activation="softmax")
+    ])
+
+
+def compile_model(model, optimizer="adam"):
+    model.compile(loss="sparse_categorical_crossentropy", optimizer=optimizer, metrics=["accuracy"])
+    return model
+
+
+def data_hash(*arrays):
+    """Content hash of the training arrays (shape, dtype and bytes of each)."""
+    digest = hashlib.sha256()
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        digest.update(f"{array.shape}{array.dtype}".encode())
+        digest.update(memoryview(array).cast('B'))
+    return digest.hexdigest()
+
+
+def model_key(model, data_digest, **training):
+    """Registry key: hash of the model architecture, the training data hash and training settings."""
+    digest = hashlib.sha256(json.dumps(_architecture(json.loads(model.to_json())), sort_keys=True).encode())
+    digest.update(data_digest.encode())
+    digest.update(json.dumps(training, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def _architecture(config):
+    """
+    The model's JSON config without layer and model names: Keras numbers them per process
+    (dense_3, sequential_1), so the same architecture would otherwise get a different key.
+    """
+    if isinstance(config, dict):
+        return {k: _architecture(v) for k, v in config.items() if k not in ('name', 'keras_history')}
+    if isinstance(config, list):
+        return [_architecture(v) for v in config]
+    return config
+
+
+def save_weights(model, key, history=None, registry_dir=MODEL_REGISTRY_DIR, max_entries=MODEL_REGISTRY_ENTRIES):
+    """Saves trained weights (and the training history) to the registry under key."""
+    os.makedirs(registry_dir, exist_ok=True)
+    path = os.path.join(registry_dir, f"{key}.weights.h5")
+    tmp_path = os.path.join(registry_dir, f"{key}.{os.getpid()}.tmp.weights.h5")
+    model.save_weights(tmp_path)
+    os.replace(tmp_path, path)
+    for name in os.listdir(registry_dir): # exports of the previous weights are stale now
+        if name.startswith(f"{key}.") and name.endswith('.tflite'):
+            os.remove(os.path.join(registry_dir, name))
+    with open(os.path.join(registry_dir, f"{key}.json"), 'w') as f:
+        json.dump({'history': history or {}}, f)
+    _evict_weights(registry_dir, max_entries)
+    return path
+
+
+def load_weights(model, key, registry_dir=MODEL_REGISTRY_DIR):
+    """
+    Loads the registry's weights for key into model. Returns the saved training history,
+    or None when the registry has no weights for key (the model is left untouched).
+    """
+    path = os.path.join(registry_dir, f"{key}.weights.h5")
+    if not os.path.exists(path):
+        return None
+    model.load_weights(path)
+    os.utime(path) # mark as recently used
+    meta_path = os.path.join(registry_dir, f"{key}.json")
+    if not os.path.exists(meta_path):
+        return {}
+    with open(meta_path) as f:
+        return json.load(f)['history']
+
+
+def _evict_weights(registry_dir, max_entries):
+    """Deletes all but the max_entries most recently used weight files (with their metadata and exports)."""
+    names = os.listdir(registry_dir)
+    weights = [name for name in names if name.endswith('.weights.h5') and '.tmp.' not in name]
+    for name in sorted(weights, key=lambda n: os.path.getmtime(os.path.join(registry_dir, n)), reverse=True)[max_entries:]:
+        key = name[:-len('.weights.h5')]
+        for related in names:
+            if related.startswith(f"{key}."):
+                os.remove(os.path.join(registry_dir, related))
@@ -0,0 +1,163 @@
+import json
+import os
+import time
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+
+AUTOTUNE = tf.data.AUTOTUNE
+# Sharded copies of an image set are written under SHARD_DIR, SHARD_SIZE images per shard
+SHARD_DIR = '.image_data_cache'
+SHARD_SIZE = 10_000
+SHARD_FORMATS = ['tfrecord', 'memmap']
+
+
+def normalize(images):
+    """uint8 pixels to float32 in [0, 1]; applied per batch so only uint8 is ever stored."""
+    return tf.cast(images, tf.float32) / 255.0
+
+
+def make_dataset(images, labels=None, batch_size=32, shuffle=False, cache=True, shuffle_buffer=None, seed=None):
+    """
+    tf.data pipeline over in-memory uint8 images (and optional labels): cache -> shuffle ->
+    batch -> normalize -> prefetch. cache may be True (memory) or a file path.
+    """
+    ds = tf.data.Dataset.from_tensor_slices(images if labels is None else (images, labels))
+    return _pipeline(ds, batch_size, shuffle, cache, shuffle_buffer or len(images), seed)
+
+
+def sharded_dataset(directory, batch_size=32, shuffle=True, cache=False, shuffle_buffer=SHARD_SIZE, seed=None):
+    """
+    Streams an image set written by write_shards, so it never has to fit in memory.
+    TFRecord shards are read in parallel and decoded per record; memmap shards are read one
+    shard at a time straight from the .npy files (the OS page cache does the caching).
+    """
+    info = shard_info(directory)
+    shards = [os.path.join(directory, shard['images']) for shard in info['shards']]
+    if info['format'] == 'tfrecord':
+        files = tf.data.Dataset.from_tensor_slices(shards)
+        if shuffle:
+            files = files.shuffle(len(shards), seed=seed, reshuffle_each_iteration=True)
+        ds = files.interleave(tf.data.TFRecordDataset, cycle_length=min(4, len(shards)),
+                              num_parallel_calls=AUTOTUNE, deterministic=not shuffle)
+        parse = _tfrecord_parser(info['image_shape'])
+        return _pipeline(ds.map(parse, num_parallel_calls=AUTOTUNE), batch_size, shuffle, cache, shuffle_buffer, seed)
+
+    image_shape = tuple(info['image_shape'])
+    rng = np.random.default_rng(seed)
+    def batches():
+        order = rng.permutation(len(info['shards'])) if shuffle else range(len(info['shards']))
+        for i in order:
+            shard = info['shards'][i]
+            images = np.load(os.path.join(directory, shard['images']), mmap_mode='r')
+            labels = np.load(os.path.join(directory, shard['labels']), mmap_mode='r')
+            index = rng.permutation(len(labels)) if shuffle else np.arange(len(labels))
+            for start in range(0, len(index), batch_size):
+                rows = np.sort(index[start:start + batch_size]) # sorted rows read the memmap forward
+                yield images[rows], labels[rows]
+    ds = tf.data.Dataset.from_generator(batches, output_signature=(
+        tf.TensorSpec((None, *image_shape), tf.uint8), tf.TensorSpec((None,), tf.int64)))
+    if cache:
+        ds = ds.cache() if cache is True else ds.cache(cache)
+    return ds.map(_normalize_batch, num_parallel_calls=AUTOTUNE).prefetch(AUTOTUNE)
+
+
+def write_shards(images, labels, directory, fmt='tfrecord', shard_size=SHARD_SIZE):
+    """
+    Writes uint8 images and integer labels as shards plus a shards.json index. images may
+    itself be a memmap; only one shard is held in memory at a time.
+    """
+    if fmt not in SHARD_FORMATS:
+        raise ValueError(f"Unknown shard format '{fmt}', expected one of {SHARD_FORMATS}.")
+    os.makedirs(directory, exist_ok=True)
+    shards = []
+    for i, start in enumerate(range(0, len(images), shard_size)):
+        shard_images = np.asarray(images[start:start + shard_size], dtype=np.uint8)
+        shard_labels = np.asarray(labels[start:start + shard_size], dtype=np.int64)
+        if fmt == 'tfrecord':
+            name = f"shard-{i:05d}.tfrecord"
+            with tf.io.TFRecordWriter(os.path.join(directory, name)) as writer:
+                for image, label in zip(shard_images, shard_labels):
+                    writer.write(_serialize_example(image, label))
+            shards.append({'images': name, 'count': len(shard_labels)})
+        else:
+            np.save(os.path.join(directory, f"images-{i:05d}.npy"), shard_images)
+            np.save(os.path.join(directory, f"labels-{i:05d}.npy"), shard_labels)
+            shards.append({'images': f"images-{i:05d}.npy", 'labels': f"labels-{i:05d}.npy", 'count': len(shard_labels)})
+    info = {'format': fmt, 'image_shape': list(np.shape(images)[1:]), 'shards': shards}
+    with open(os.path.join(directory, 'shards.json'), 'w') as f:
+        json.dump(info, f, indent=2)
+    return info
+
+
+def shard_info(directory):
+    """The shards.json index of a sharded image set (format, image shape and per-shard counts)."""
+    with open(os.path.join(directory, 'shards.json')) as f:
+        return json.load(f)
+
+
+def shard_count(directory):
+    """Number of images in a sharded image set."""
+    return sum(shard['count'] for shard in shard_info(directory)['shards'])
+
+
+class ThroughputCallback(keras.callbacks.Callback):
+    """
+    Records training wall time, samples/sec and process CPU utilization for every epoch.
+    cpu_percent is process CPU time over wall time (100 = one core busy, so it can exceed 100).
+    The figures are also added to the epoch logs, and therefore to the History.
+    """
+
+    def __init__(self, samples_per_epoch, on_epoch=None):
+        super().__init__()
+        self.samples_per_epoch = samples_per_epoch
+        self.on_epoch = on_epoch # called with each epoch's record
+        self.epochs = []
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._start_wall = self._end_wall = time.perf_counter()
+        self._start_cpu = self._end_cpu = time.process_time()
+
+    def on_train_batch_end(self, batch, logs=None):
+        # The last training batch marks the end of the epoch (validation is not counted)
+        self._end_wall, self._end_cpu = time.perf_counter(), time.process_time()
+
+    def on_epoch_end(self, epoch, logs=None):
+        wall = max(self._end_wall - self._start_wall, 1e-9)
+        record = {'epoch': epoch + 1, 'seconds': wall,
+                  'samples_per_sec': self.samples_per_epoch / wall,
+                  'cpu_percent': 100 * (self._end_cpu - self._start_cpu) / wall}
+        self.epochs.append(record)
+        if logs is not None:
+            logs.update({k: v for k, v in record.items() if k != 'epoch'})
+        if self.on_epoch is not None:
+            self.on_epoch(record)
+
+
+def _pipeline(ds, batch_size, shuffle, cache, shuffle_buffer, seed):
+    if cache:
+        ds = ds.cache() if cache is True else ds.cache(cache)
+    if shuffle:
+        ds = ds.shuffle(shuffle_buffer, seed=seed, reshuffle_each_iteration=True)
+    ds = ds.batch(batch_size)
+    return ds.map(_normalize_batch, num_parallel_calls=AUTOTUNE).prefetch(AUTOTUNE)
+
+
+def _normalize_batch(images, *labels):
+    return (normalize(images), *labels) if labels else normalize(images)
+
+
+def _serialize_example(image, label):
+    return tf.train.Example(features=tf.train.Features(feature={
+        'image': tf.train.Feature(bytes_list=tf.train.BytesList(value=[image.tobytes()])),
+        'label': tf.train.Feature(int64_list=tf.train.Int64List(value=[int(label)])),
+    })).SerializeToString()
+
+
+def _tfrecord_parser(image_shape):
+    features = {'image': tf.io.FixedLenFeature([], tf.string), 'label': tf.io.FixedLenFeature([], tf.int64)}
+    def parse(record):
+        example = tf.io.parse_single_example(record, features)
+        image = tf.reshape(tf.io.decode_raw(example['image'], tf.uint8), image_shape)
+        return image, example['label']
+    return parse
@@ -0,0 +1,57 @@
+import struct
+import zlib
+import numpy as np
+
+# PNG compression level: low levels are much faster and barely larger for small images
+PNG_COMPRESSION = 1
+CORRECT_COLOR = (40, 167, 69)
+WRONG_COLOR = (220, 53, 69)
+
+
+def encode_png(image, compression=PNG_COMPRESSION):
+    """
+    Encodes a uint8 array as PNG bytes without matplotlib or an imaging library:
+    (h, w) is written as 8-bit grayscale, (h, w, 3) as 8-bit RGB.
+    """
+    image = np.ascontiguousarray(image, dtype=np.uint8)
+    if image.ndim == 2:
+        color_type = 0
+    elif image.ndim == 3 and image.shape[2] == 3:
+        color_type = 2
+    else:
+        raise ValueError(f"Expected a (h, w) or (h, w, 3) image, got shape {image.shape}.")
+    height, width = image.shape[:2]
+    # Each scanline is prefixed by its filter type (0 = none)
+    scanlines = np.zeros((height, 1 + image[0].size), dtype=np.uint8)
+    scanlines[:, 1:] = image.reshape(height, -1)
+    header = struct.pack('>IIBBBBB', width, height, 8, color_type, 0, 0, 0)
+    return b''.join([b'\x89PNG\r\n\x1a\n', _chunk(b'IHDR', header),
+                     _chunk(b'IDAT', zlib.compress(scanlines.tobytes(), compression)), _chunk(b'IEND', b'')])
+
+
+def upscale(image, scale):
+    """Nearest-neighbour enlargement by an integer factor (keeps small digits crisp in the browser)."""
+    return image if scale == 1 else image.repeat(scale, axis=0).repeat(scale, axis=1)
+
+
+def montage(images, columns=10, padding=2, border_colors=None, scale=1):
+    """
+    Tiles (n, h, w) uint8 images into one (rows*h, columns*w) image separated by padding
+    pixels. With border_colors (one RGB tuple per image) the result is RGB and each tile
+    is framed in its colour.
+    """
+    images = np.asarray(images, dtype=np.uint8)
+    n, h, w = images.shape
+    rows = max(1, -(-n // columns))
+    cell_h, cell_w = h + 2 * padding, w + 2 * padding
+    grid = np.zeros((rows, columns, cell_h, cell_w, 3 if border_colors is not None else 1), dtype=np.uint8)
+    cells = grid.reshape(rows * columns, cell_h, cell_w, -1)[:n]
+    if border_colors is not None:
+        cells[:] = np.asarray(border_colors, dtype=np.uint8)[:, None, None, :]
+    cells[:, padding:padding + h, padding:padding + w] = images[..., None]
+    tiled = grid.transpose(0, 2, 1, 3, 4).reshape(rows * cell_h, columns * cell_w, -1)
+    return upscale(tiled[..., 0] if border_colors is None else tiled, scale)
+
+
+def _chunk(kind, data):
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
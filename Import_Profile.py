@@ -0,0 +1,93 @@
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+
+# Streamlit apps served by Launcher.py: script -> page title
+APPS = {'Data_Analysis.py': 'Data Analysis',
+        'Book_Recommendation.py': 'Book Recommendation',
+        'Image_Classification.py': 'Image Classification'}
+# Dependencies that take long enough to import that the apps load them only when needed
+HEAVY_MODULES = ['tensorflow', 'sklearn', 'plotly.express', 'plotly.graph_objects', 'st_aggrid', 'matplotlib.pyplot']
+# Imported before a script's own imports: the launcher has already paid for it
+BASELINE_MODULES = ['streamlit']
+
+# Runs in a fresh interpreter: imports each module in turn and prints the seconds each one added
+_DRIVER = """
+import json, sys, time
+seconds = []
+for module in sys.argv[1:]:
+    start = time.perf_counter()
+    __import__(module)
+    seconds.append(time.perf_counter() - start)
+print(json.dumps(seconds))
+"""
+
+
+def script_imports(path):
+    """Modules a script imports at its top level, in order (imports inside functions are lazy and left out)."""
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read(), filename=path)
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            names = [node.module]
+        else:
+            continue
+        modules.extend(name for name in names if name not in modules)
+    return modules
+
+
+def profile_imports(modules, baseline=BASELINE_MODULES, cwd=None, top=15):
+    """
+    Imports baseline then modules in a fresh interpreter under -X importtime. Returns a dict:
+    'imports' lists (module, ms) for each of modules, where ms is what that import added
+    (dependencies count towards the first import that loads them, as on a real cold start),
+    'total_ms' their sum and 'heaviest' the top (module, self_ms, cumulative_ms) entries of
+    the interpreter's own per-module report.
+    """
+    modules = [module for module in modules if module not in baseline]
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', _DRIVER, *baseline, *modules],
+                             cwd=cwd, capture_output=True, text=True)
+    if process.returncode != 0:
+        raise RuntimeError(f"Importing {modules} failed:\n{process.stderr.strip().splitlines()[-1]}")
+    seconds = json.loads(process.stdout.strip().splitlines()[-1])[len(baseline):]
+
+    heaviest = []
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        heaviest.append((name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000))
+    heaviest.sort(key=lambda row: row[1], reverse=True)
+    imports = [(module, s * 1000) for module, s in zip(modules, seconds)]
+    return {'imports': imports, 'total_ms': sum(ms for _, ms in imports), 'heaviest': heaviest[:top]}
+
+
+def profile_script(path, top=15):
+    """profile_imports for the top-level imports of a script, run from the script's directory."""
+    return profile_imports(script_imports(path), cwd=os.path.dirname(os.path.abspath(path)), top=top)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report what each top-level import of the Streamlit apps costs on a cold start.")
+    parser.add_argument("scripts", nargs="*", default=list(APPS))
+    parser.add_argument("--top", type=int, default=10, help="Heaviest individual modules to list per script")
+    args = parser.parse_args()
+
+    for script in args.scripts:
+        try:
+            report = profile_script(script, args.top)
+        except RuntimeError as e:
+            print(f"{script}: {e}")
+            continue
+        print(f"{script}: {report['total_ms']:.0f} ms of imports after {', '.join(BASELINE_MODULES)}")
+        for module, ms in report['imports']:
+            print(f"  {ms:8.1f} ms  {module}")
+        print("  heaviest modules (self / cumulative ms):")
+        for module, self_ms, cumulative_ms in report['heaviest']:
+            print(f"  {self_ms:8.1f} / {cumulative_ms:8.1f}  {module}")
@@ -0,0 +1,50 @@
+import os
+import sys
+import streamlit as st
+from Import_Profile import APPS, BASELINE_MODULES, HEAVY_MODULES, profile_script
+
+# One Streamlit server for every app. Only Streamlit is imported up front: each app's heavy
+# dependencies load the first time its page is opened, and the datasets and models it caches
+# with st.cache_resource are then shared by every page and session of the server.
+st.set_page_config(page_title="Data Apps", layout="wide")
+
+
+def home():
+    st.title("Data Apps")
+    st.write("Choose an app in the sidebar. TensorFlow, scikit-learn, Plotly and AgGrid are imported the first "
+             "time an app needs them; datasets and models stay cached for the lifetime of the server.")
+    loaded = [module for module in HEAVY_MODULES if module in sys.modules]
+    st.caption(f"Heavy dependencies loaded in this server: {', '.join(loaded) if loaded else 'none yet'}")
+
+
+# Profiles are cached per script version; re-profiling a script means importing its dependencies again
+@st.cache_data(show_spinner=False)
+def cached_profile(path, modified):
+    return profile_script(path)
+
+
+def import_profile():
+    st.title("Import Profile")
+    st.write(f"What each app's top-level imports cost on a cold start, measured in a fresh interpreter after "
+             f"{', '.join(BASELINE_MODULES)} (which the launcher always loads). Imports inside functions are lazy and not counted.")
+    scripts = st.multiselect("Apps", list(APPS), default=list(APPS), format_func=APPS.get)
+    if not st.button("Profile imports"):
+        return
+    for script in scripts:
+        try:
+            with st.spinner(f"Importing the dependencies of {APPS[script]}..."):
+                report = cached_profile(script, os.path.getmtime(script))
+        except RuntimeError as e:
+            st.error(f"{APPS[script]}: {e}")
+            continue
+        st.subheader(f"{APPS[script]}: {report['total_ms']:,.0f} ms")
+        imports_col, heaviest_col = st.columns(2)
+        imports_col.dataframe([{'import': module, 'ms': round(ms, 1)} for module, ms in report['imports']],
+                              hide_index=True)
+        heaviest_col.dataframe([{'module': module, 'self ms': round(self_ms, 1), 'cumulative ms': round(cumulative_ms, 1)}
+                                for module, self_ms, cumulative_ms in report['heaviest']], hide_index=True)
+
+
+st.navigation([st.Page(home, title="Home", default=True),
+               *[st.Page(script, title=title) for script, title in APPS.items()],
+               st.Page(import_profile, title="Import profile")]).run()
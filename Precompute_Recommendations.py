@@ -0,0 +1,68 @@
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from Book_Similarity import load_or_fit_model
+from Ratings_CF import CollaborativeFilter, build_ratings_matrix, load_ratings
+from Recommendation_Table import write_table
+
+# Users are scored in batches of this many (each batch is one CollaborativeFilter.recommend call)
+USER_BATCH = 5000
+
+
+def precompute_book_table(path, titles, descriptions, n=10, backend='exact'):
+    """
+    Writes the top-n similar books for every title of a catalogue (TF-IDF path) to a
+    recommendation table keyed by title. Reuses the cached fitted model when there is one.
+    """
+    _, recommender = load_or_fit_model(titles, descriptions, k=10, backend=backend)
+    keys = pd.unique(recommender.titles) # one row per distinct title
+    rows, scores = recommender.neighbors(recommender.resolve(keys), n)
+    write_table(path, keys, recommender.titles, rows, scores)
+    return len(keys)
+
+
+def precompute_user_table(path, ratings, n=10, kind='user', k=30, min_user_ratings=1, batch_size=USER_BATCH):
+    """
+    Writes the top-n recommended items for every active user (at least min_user_ratings
+    ratings) of a RatingsMatrix to a recommendation table keyed by user id.
+    """
+    cf = CollaborativeFilter(ratings, kind=kind, k=k)
+    counts = np.diff(ratings.matrix.indptr)
+    users = ratings.users[counts >= min_user_ratings]
+    rows = np.full((len(users), n), -1, dtype=np.int32)
+    scores = np.zeros((len(users), n), dtype=np.float32)
+    for start in range(0, len(users), batch_size):
+        batch = cf.recommend(users[start:start + batch_size], n=n)
+        row = start + pd.Index(users[start:start + batch_size]).get_indexer(batch['user'])
+        rank = batch['rank'].to_numpy() - 1
+        rows[row, rank] = ratings.item_positions(batch['item'])
+        scores[row, rank] = batch['predicted_rating'].to_numpy()
+    write_table(path, users, ratings.items, rows, scores)
+    return len(users)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute recommendation tables for Recommendation_Table.py lookups.")
+    subparsers = parser.add_subparsers(dest="source", required=True)
+    books = subparsers.add_parser("books", help="Similar books for every title (TF-IDF over descriptions)")
+    books.add_argument("catalogue", help="CSV with book_title and book_desc columns")
+    books.add_argument("--backend", choices=["exact", "ann"], default="exact")
+    users = subparsers.add_parser("users", help="Recommended books for every active user (collaborative filtering)")
+    users.add_argument("ratings", help="Ratings.csv (User-ID, ISBN, Book-Rating)")
+    users.add_argument("--books", help="Books.csv, to recommend by title instead of ISBN")
+    users.add_argument("--kind", choices=["user", "item"], default="user")
+    users.add_argument("--min-user-ratings", type=int, default=5, help="Users with fewer ratings are not precomputed")
+    for sub in (books, users):
+        sub.add_argument("--out", required=True, help="Table file to write")
+        sub.add_argument("-n", type=int, default=10, help="Recommendations per key")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.source == "books":
+        data = pd.read_csv(args.catalogue)[["book_title", "book_desc"]].dropna()
+        n_keys = precompute_book_table(args.out, data["book_title"].tolist(), data["book_desc"].tolist(), args.n, args.backend)
+    else:
+        ratings = build_ratings_matrix(load_ratings(args.ratings, args.books))
+        n_keys = precompute_user_table(args.out, ratings, args.n, args.kind, min_user_ratings=args.min_user_ratings)
+    print(f"Wrote {n_keys:,} keys to {args.out} in {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,280 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.preprocessing import normalize
+from Book_Similarity import BLOCK_ENTRIES, topk_of_similarity
+
+# Similarity blocks denser than this are selected from a dense copy (a partial sort per row beats sorting every entry)
+DENSE_SELECTION_DENSITY = 0.05
+# Collaborative filtering kinds: neighbours are either users (who rated alike) or items (rated alike)
+KINDS = ['user', 'item']
+
+class RatingsMatrix:
+    """
+    Explicit ratings as an integer-coded CSR matrix: row i is user users[i], column j is
+    item items[j]. User and item ids are resolved through hash indexes.
+    """
+
+    def __init__(self, matrix, users, items):
+        self.matrix = matrix.tocsr().astype(np.float32) # (n_users, n_items), 0 = not rated
+        self.matrix.sort_indices()
+        self.users = np.asarray(users)
+        self.items = np.asarray(items, dtype=object)
+        self._user_index = pd.Index(self.users)
+        self._item_index = pd.Index(self.items)
+        counts = np.diff(self.matrix.indptr)
+        self.user_means = np.asarray(self.matrix.sum(axis=1)).ravel() / np.maximum(counts, 1)
+        # Lowest and highest observed rating: the scale predictions are clipped to
+        self.rating_range = (float(self.matrix.data.min()), float(self.matrix.data.max())) if self.matrix.nnz else (0.0, 0.0)
+
+    @property
+    def shape(self):
+        return self.matrix.shape
+
+    @property
+    def rated(self):
+        """0/1 matrix of which items each user rated."""
+        rated = self.matrix.copy()
+        rated.data[:] = 1
+        return rated
+
+    def centred(self):
+        """Ratings minus each user's mean rating, on the rated entries only."""
+        centred = self.matrix.copy()
+        centred.data -= np.repeat(self.user_means, np.diff(centred.indptr)).astype(np.float32)
+        return centred
+
+    def user_positions(self, user_ids):
+        """Row positions for a batch of user ids (-1 for unknown users)."""
+        return self._user_index.get_indexer(pd.Index(np.asarray(user_ids)))
+
+    def item_positions(self, item_ids):
+        """Column positions for a batch of item ids (-1 for unknown items)."""
+        return self._item_index.get_indexer(pd.Index(np.asarray(item_ids, dtype=object)))
+
+class CollaborativeFilter:
+    """
+    Neighbourhood collaborative filtering over a RatingsMatrix.
+    Similarities are cosine similarities of mean-centred ratings (Pearson-style for users,
+    adjusted cosine for items) computed with blocked sparse products, so no dense user x
+    user (or item x item) table is ever built. Predictions are the user's mean plus the
+    similarity-weighted average of the neighbours' centred ratings, clipped to the observed
+    rating range.
+    """
+
+    def __init__(self, ratings, kind='user', k=30, min_similarity=0.0):
+        if kind not in KINDS:
+            raise ValueError(f"Unknown collaborative filtering kind '{kind}', expected one of {KINDS}.")
+        self.ratings = ratings
+        self.kind = kind
+        self.k = k
+        self.min_similarity = min_similarity
+        self._centred = ratings.centred()
+        self._rated = ratings.rated
+        # Rows of vectors are the entities compared: users, or items (columns of the ratings)
+        vectors = self._centred if kind == 'user' else self._centred.T.tocsr()
+        self.vectors = normalize(vectors, norm='l2', axis=1)
+        # Item neighbour lists are computed on first use and kept (n_items x k)
+        self._item_neighbors = None
+
+    def neighbors(self, positions, k=None):
+        """
+        (positions, scores) arrays of shape (len(positions), k) for rows of self.vectors
+        (user rows for kind='user', item columns for kind='item'), best first.
+        Neighbours below min_similarity are padded with -1 / 0.0.
+        """
+        k = self.k if k is None else k
+        positions = np.asarray(positions, dtype=np.int64)
+        block_rows = max(1, BLOCK_ENTRIES // max(self.vectors.shape[0], 1))
+        blocks = [sparse_topk_rows(self.vectors[positions[i:i + block_rows]], self.vectors, k, self_rows=positions[i:i + block_rows])
+                  for i in range(0, len(positions), block_rows)]
+        if not blocks:
+            return np.empty((0, k), dtype=np.int32), np.empty((0, k), dtype=np.float32)
+        neighbors, scores = np.vstack([b[0] for b in blocks]), np.vstack([b[1] for b in blocks])
+        weak = scores <= self.min_similarity
+        neighbors[weak], scores[weak] = -1, 0.0
+        return neighbors, scores
+
+    def similar(self, ids, k=None):
+        """
+        Top-k neighbours for a batch of user ids (kind='user') or item ids (kind='item'), as a
+        long DataFrame with columns query, rank, neighbor and similarity. Unknown ids are skipped.
+        """
+        ids = np.asarray(ids, dtype=object if self.kind == 'item' else None)
+        positions = self.ratings.user_positions(ids) if self.kind == 'user' else self.ratings.item_positions(ids)
+        known = positions >= 0
+        neighbors, scores = self.neighbors(positions[known], k)
+        query, rank = np.nonzero(neighbors >= 0)
+        labels = self.ratings.users if self.kind == 'user' else self.ratings.items
+        return pd.DataFrame({'query': ids[known][query], 'rank': rank + 1,
+                             'neighbor': labels[neighbors[query, rank]], 'similarity': scores[query, rank]})
+
+    def recommend(self, user_ids, n=10, min_support=1):
+        """
+        Top-n unrated items for a batch of users, as a long DataFrame with columns user, rank,
+        item, predicted_rating and support (how many neighbours contributed). Items need at
+        least min_support contributing neighbours. Users are scored a block at a time, the
+        block size bounded by BLOCK_ENTRIES so the dense score rows stay small.
+        """
+        user_ids = np.asarray(user_ids)
+        positions = self.ratings.user_positions(user_ids)
+        known = np.flatnonzero(positions >= 0)
+        n_items = self.ratings.shape[1]
+        block_rows = max(1, BLOCK_ENTRIES // (4 * max(n_items, 1)))
+        frames = []
+        for start in range(0, len(known), block_rows):
+            rows = known[start:start + block_rows]
+            items, predicted, support = self._recommend_block(positions[rows], n, min_support)
+            query, rank = np.nonzero(items >= 0)
+            frames.append(pd.DataFrame({'user': user_ids[rows][query], 'rank': rank + 1,
+                                        'item': self.ratings.items[items[query, rank]],
+                                        'predicted_rating': predicted[query, rank], 'support': support[query, rank]}))
+        if not frames:
+            return pd.DataFrame(columns=['user', 'rank', 'item', 'predicted_rating', 'support'])
+        return pd.concat(frames, ignore_index=True)
+
+    def _recommend_block(self, users, n, min_support):
+        """(items, predicted ratings, support) arrays of shape (len(users), n) for user row positions."""
+        rated = self._rated[users]
+        if self.kind == 'user':
+            # Weights of each user's neighbours, applied to the neighbours' centred ratings
+            weights = self._weight_matrix(users, *self.neighbors(users), self.ratings.shape[0])
+            numerator = weights @ self._centred
+            denominator = abs(weights) @ self._rated
+            support = (weights != 0).astype(np.float32) @ self._rated
+        else:
+            # The user's centred ratings, spread to the neighbours of each rated item
+            item_weights = self._item_weight_matrix(np.unique(rated.indices))
+            numerator = self._centred[users] @ item_weights
+            denominator = rated @ abs(item_weights)
+            support = rated @ (item_weights != 0).astype(np.float32)
+
+        # Only items some neighbour rated can be recommended: work on those columns alone
+        candidates = np.unique(denominator.indices)
+        numerator, denominator, support, rated = (m[:, candidates].toarray() for m in (numerator, denominator, support, rated))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            predicted = self.ratings.user_means[users, None] + numerator / denominator
+        valid = (denominator > 0) & (support >= min_support) & (rated == 0)
+        predicted = np.where(valid, predicted, -np.inf)
+
+        items = np.full((len(users), n), -1, dtype=np.int64)
+        scores = np.zeros((len(users), n), dtype=np.float32)
+        counts = np.zeros((len(users), n), dtype=np.int32)
+        n_eff = min(n, predicted.shape[1])
+        if n_eff == 0:
+            return items, scores, counts
+        top = np.argpartition(-predicted, n_eff - 1, axis=1)[:, :n_eff]
+        top_scores = np.take_along_axis(predicted, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        top, top_scores = np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+        found = np.isfinite(top_scores)
+        items[:, :n_eff] = np.where(found, candidates[top], -1)
+        # Ranked on the unclipped predictions so items past the top of the scale keep their order
+        scores[:, :n_eff] = np.where(found, np.clip(top_scores, *self.ratings.rating_range), 0.0)
+        counts[:, :n_eff] = np.where(found, np.take_along_axis(support, top, axis=1), 0)
+        return items, scores, counts
+
+    def _weight_matrix(self, rows, neighbors, scores, n_columns):
+        """Sparse (len(rows), n_columns) matrix holding each row's neighbour similarities."""
+        query, rank = np.nonzero(neighbors >= 0)
+        return sp.csr_matrix((scores[query, rank], (query, neighbors[query, rank])), shape=(len(rows), n_columns))
+
+    def _item_weight_matrix(self, items):
+        """Sparse (n_items, n_items) matrix whose row j holds item j's neighbour similarities (rows in items only)."""
+        n_items = self.ratings.shape[1]
+        if self._item_neighbors is None:
+            self._item_neighbors = (np.full((n_items, self.k), -2, dtype=np.int32), np.zeros((n_items, self.k), dtype=np.float32))
+        neighbors, scores = self._item_neighbors
+        missing = items[neighbors[items, 0] == -2]
+        if len(missing):
+            neighbors[missing], scores[missing] = self.neighbors(missing)
+        row, rank = np.nonzero(neighbors[items] >= 0)
+        return sp.csr_matrix((scores[items][row, rank], (items[row], neighbors[items][row, rank])), shape=(n_items, n_items))
+
+def sparse_topk_rows(query_rows, matrix, k, self_rows=None):
+    """
+    Top-k most similar rows of matrix for each query row, best first, like
+    Book_Similarity.topk_rows but selected from the sparse product itself: rating vectors
+    share few items, so most similarities are zero and never become candidates.
+    Missing neighbours are padded with -1 / 0.0.
+    """
+    similarity = (query_rows @ matrix.T).tocsr()
+    n_queries = similarity.shape[0]
+    if similarity.nnz > DENSE_SELECTION_DENSITY * n_queries * similarity.shape[1]:
+        dense = similarity.toarray()
+        dense[dense == 0] = -np.inf # zero similarity is no neighbour
+        return topk_of_similarity(dense, k, self_rows)
+    row = np.repeat(np.arange(n_queries), np.diff(similarity.indptr))
+    column, score = similarity.indices, similarity.data
+    if self_rows is not None:
+        keep = column != np.asarray(self_rows)[row]
+        row, column, score = row[keep], column[keep], score[keep]
+    order = np.lexsort((-score, row)) # by query, best first
+    row, column, score = row[order], column[order], score[order]
+    rank = np.arange(len(row)) - np.searchsorted(row, row)
+    top = rank < k
+    neighbors = np.full((n_queries, k), -1, dtype=np.int32)
+    scores = np.zeros((n_queries, k), dtype=np.float32)
+    neighbors[row[top], rank[top]] = column[top]
+    scores[row[top], rank[top]] = score[top]
+    return neighbors, scores
+
+def load_ratings(ratings_path, books_path=None, explicit_only=True, min_item_ratings=1, min_user_ratings=1):
+    """
+    Reads the Book-Crossing ratings file (User-ID, ISBN, Book-Rating) with compact dtypes.
+    With books_path, items are book titles (as in the ratings notebook) instead of ISBNs.
+    explicit_only drops the implicit 0 ratings; the minimum counts drop rarely rated items
+    and then users with few ratings, like the notebook's filters.
+    """
+    ratings = pd.read_csv(ratings_path, dtype={'User-ID': np.int32, 'ISBN': str, 'Book-Rating': np.int8},
+                          encoding_errors='replace')
+    if explicit_only:
+        ratings = ratings[ratings['Book-Rating'] > 0]
+    if books_path is not None:
+        books = pd.read_csv(books_path, usecols=['ISBN', 'Book-Title'], dtype=str, encoding_errors='replace')
+        ratings = ratings.merge(books.drop_duplicates('ISBN'), on='ISBN', how='inner')
+    item_column = 'Book-Title' if books_path is not None else 'ISBN'
+    ratings = ratings.rename(columns={'User-ID': 'user', item_column: 'item', 'Book-Rating': 'rating'})
+    ratings = ratings[['user', 'item', 'rating']]
+    if min_item_ratings > 1:
+        ratings = ratings[ratings['item'].map(ratings['item'].value_counts()) >= min_item_ratings]
+    if min_user_ratings > 1:
+        ratings = ratings[ratings['user'].map(ratings['user'].value_counts()) >= min_user_ratings]
+    return ratings.reset_index(drop=True)
+
+def build_ratings_matrix(ratings, user_column='user', item_column='item', rating_column='rating'):
+    """
+    Integer-codes users and items and builds the CSR ratings matrix. Repeated (user, item)
+    pairs, such as one user rating two editions of a title, are averaged.
+    """
+    user_codes, users = pd.factorize(ratings[user_column], sort=True)
+    item_codes, items = pd.factorize(ratings[item_column], sort=True)
+    shape = (len(users), len(items))
+    values = ratings[rating_column].to_numpy(dtype=np.float32)
+    totals = sp.csr_matrix((values, (user_codes, item_codes)), shape=shape) # duplicates are summed
+    counts = sp.csr_matrix((np.ones_like(values), (user_codes, item_codes)), shape=shape)
+    totals.sum_duplicates()
+    counts.sum_duplicates()
+    totals.data /= counts.data
+    return RatingsMatrix(totals, np.asarray(users), np.asarray(items, dtype=object))
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    parser = argparse.ArgumentParser(description="User- or item-based collaborative filtering over the Book-Crossing ratings.")
+    parser.add_argument("ratings", help="Ratings.csv (User-ID, ISBN, Book-Rating)")
+    parser.add_argument("--books", help="Books.csv, to recommend by title instead of ISBN")
+    parser.add_argument("--users", nargs="+", type=int, required=True, help="User ids to recommend for")
+    parser.add_argument("--kind", choices=KINDS, default="user")
+    parser.add_argument("--k", type=int, default=30, help="Neighbours per user/item")
+    parser.add_argument("-n", type=int, default=10, help="Recommendations per user")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    ratings = build_ratings_matrix(load_ratings(args.ratings, args.books))
+    print(f"{ratings.matrix.nnz:,} ratings from {ratings.shape[0]:,} users on {ratings.shape[1]:,} items "
+          f"loaded in {time.perf_counter() - start:.2f}s")
+    start = time.perf_counter()
+    recommendations = CollaborativeFilter(ratings, kind=args.kind, k=args.k).recommend(args.users, n=args.n)
+    print(f"Recommended for {len(args.users)} users in {time.perf_counter() - start:.2f}s")
+    print(recommendations.to_string(index=False))
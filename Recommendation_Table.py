@@ -0,0 +1,166 @@
+# Precomputed recommendation tables: one file mapping each key (a book title or a user id) to its
+# top-N recommendations, served straight from a memory map. Reading needs only the standard library,
+# so serving processes never import NumPy, pandas or scikit-learn (Precompute_Recommendations.py builds tables).
+#
+# File layout (little-endian, sections 8-byte aligned):
+#   header  magic, key/label counts, row width, slot count and section offsets
+#   slots   open-addressing hash table of (key hash, key number + 1), 16 bytes per slot
+#   keys    key offsets (n_keys + 1, uint64) followed by the UTF-8 key bytes
+#   labels  label offsets (n_labels + 1, uint64) followed by the UTF-8 label bytes
+#   rows    (n_keys, width) int32 label numbers, -1 padded
+#   scores  (n_keys, width) float32 scores
+import argparse
+import hashlib
+import mmap
+import struct
+import sys
+import time
+
+MAGIC = b'RECTAB01'
+HEADER = struct.Struct('<8sQQIIQ7Q')
+SLOT = struct.Struct('<QQ')
+
+
+def key_hash(key_bytes):
+    """64-bit hash of a key's UTF-8 bytes (the same in every process, unlike hash())."""
+    return int.from_bytes(hashlib.blake2b(key_bytes, digest_size=8).digest(), 'little')
+
+
+def write_table(path, keys, labels, rows, scores):
+    """
+    Writes a recommendation table. keys and labels are sequences of strings; rows is an
+    (n_keys, width) integer array of label numbers (-1 for no recommendation) and scores
+    the matching float array. Later duplicate keys are ignored.
+    """
+    import numpy as np
+    keys = [str(key) for key in keys]
+    rows = np.ascontiguousarray(rows, dtype='<i4')
+    scores = np.ascontiguousarray(scores, dtype='<f4')
+    n_keys, width = rows.shape if rows.ndim == 2 else (len(keys), 0)
+
+    n_slots = 1
+    while n_slots < 2 * max(n_keys, 1):
+        n_slots *= 2
+    slots = np.zeros((n_slots, 2), dtype='<u8')
+    key_blobs = [key.encode('utf-8') for key in keys]
+    for number, blob in enumerate(key_blobs):
+        h = key_hash(blob)
+        slot = h & (n_slots - 1)
+        while slots[slot, 1]:
+            if slots[slot, 0] == h and key_blobs[slots[slot, 1] - 1] == blob:
+                break # duplicate key: the first one wins
+            slot = (slot + 1) & (n_slots - 1)
+        else:
+            slots[slot] = (h, number + 1)
+
+    sections = [slots.tobytes(), _string_pool(key_blobs),
+                _string_pool([str(label).encode('utf-8') for label in labels]), rows.tobytes(), scores.tobytes()]
+    offsets, position = [], HEADER.size
+    for section in sections:
+        position += -position % 8 # 8-byte aligned sections
+        offsets.append(position)
+        position += len(section)
+    header = HEADER.pack(MAGIC, n_keys, len(labels), width, 0, n_slots, *offsets, position, 0)
+    with open(path, 'wb') as f:
+        f.write(header)
+        for offset, section in zip(offsets, sections):
+            f.write(b'\0' * (offset - f.tell()))
+            f.write(section)
+
+
+class RecommendationTable:
+    """
+    Read-only lookups in a table written by write_table. Opening maps the file; a lookup
+    hashes the key, probes the slot table and decodes one row, so its cost does not depend
+    on the table size and nothing is loaded up front.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, self.n_keys, self.n_labels, self.width, _, self.n_slots, self._slots, self._keys,
+         self._labels, self._rows, self._scores, _, _) = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a recommendation table.")
+        view = memoryview(self._map)
+        self._key_offsets = view[self._keys:self._keys + 8 * (self.n_keys + 1)].cast('Q')
+        self._label_offsets = view[self._labels:self._labels + 8 * (self.n_labels + 1)].cast('Q')
+        self._row_view = view[self._rows:self._rows + 4 * self.n_keys * self.width].cast('i')
+        self._score_view = view[self._scores:self._scores + 4 * self.n_keys * self.width].cast('f')
+
+    def __len__(self):
+        return self.n_keys
+
+    def __contains__(self, key):
+        return self._find(key) >= 0
+
+    def get(self, key, n=None):
+        """[(label, score), ...] for key, best first (None for unknown keys)."""
+        number = self._find(key)
+        if number < 0:
+            return None
+        start = number * self.width
+        end = start + (self.width if n is None else min(n, self.width))
+        return [(self._label(label), score)
+                for label, score in zip(self._row_view[start:end], self._score_view[start:end]) if label >= 0]
+
+    def close(self):
+        for view in (self._key_offsets, self._label_offsets, self._row_view, self._score_view):
+            view.release()
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _find(self, key):
+        """Key number of key, or -1."""
+        blob = str(key).encode('utf-8')
+        h = key_hash(blob)
+        slot = h & (self.n_slots - 1)
+        while True:
+            stored_hash, number = SLOT.unpack_from(self._map, self._slots + SLOT.size * slot)
+            if number == 0:
+                return -1
+            if stored_hash == h and self._key(number - 1) == blob:
+                return number - 1
+            slot = (slot + 1) & (self.n_slots - 1)
+
+    def _key(self, number):
+        base = self._keys + 8 * (self.n_keys + 1)
+        return self._map[base + self._key_offsets[number]:base + self._key_offsets[number + 1]]
+
+    def _label(self, number):
+        base = self._labels + 8 * (self.n_labels + 1)
+        return self._map[base + self._label_offsets[number]:base + self._label_offsets[number + 1]].decode('utf-8')
+
+
+def _string_pool(blobs):
+    """uint64 offsets (len(blobs) + 1) followed by the concatenated bytes."""
+    offsets = [0]
+    for blob in blobs:
+        offsets.append(offsets[-1] + len(blob))
+    return struct.pack(f'<{len(offsets)}Q', *offsets) + b''.join(blobs)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Look up precomputed recommendations.")
+    parser.add_argument("table", help="Table file written by Precompute_Recommendations.py")
+    parser.add_argument("keys", nargs="*", help="Book titles or user ids (read from stdin, one per line, when omitted)")
+    parser.add_argument("-n", type=int, help="Recommendations per key (default: all stored)")
+    args = parser.parse_args()
+
+    with RecommendationTable(args.table) as table:
+        for key in args.keys or (line.rstrip('\n') for line in sys.stdin):
+            start = time.perf_counter()
+            recommendations = table.get(key, args.n)
+            elapsed_us = (time.perf_counter() - start) * 1e6
+            if recommendations is None:
+                print(f"{key}: not found ({elapsed_us:.0f} us)")
+                continue
+            print(f"{key} ({elapsed_us:.0f} us):")
+            for rank, (label, score) in enumerate(recommendations, 1):
+                print(f"  {rank}. {label} ({score:.3f})")
@@ -0,0 +1,235 @@
+import argparse
+import math
+import os
+import pickle
+import time
+import numpy as np
+import pandas as pd
+
+# Rolling windows (in days, ending at each device/app's latest day) kept up to date on every ingest
+WINDOWS = (7, 30)
+METRICS = ['Usage', 'Notifications', 'Times opened']
+# Optional column identifying the device; files without it are treated as a single device
+DEVICE_COLUMN = 'Device'
+DATE_FORMAT = '%m/%d/%Y'
+# Relative error of the all-time daily usage percentiles
+SKETCH_ACCURACY = 0.01
+STATE_PATH = 'screen_time_rollup.pkl'
+
+
+class QuantileSketch:
+    """
+    Log-bucketed quantile sketch (DDSketch): every returned quantile is within
+    relative_accuracy of a value of the right rank, memory grows with the log of the value
+    range rather than the count, and values can be removed again.
+    """
+
+    def __init__(self, relative_accuracy=SKETCH_ACCURACY):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins = {} # bucket index -> count of values in (gamma ** (index - 1), gamma ** index]
+        self.zero_count = 0 # values <= 0
+        self.count = 0
+
+    def add(self, value, count=1):
+        if value <= 0:
+            self.zero_count += count
+        else:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            remaining = self.bins.get(index, 0) + count
+            if remaining:
+                self.bins[index] = remaining
+            else:
+                del self.bins[index]
+        self.count += count
+
+    def remove(self, value):
+        self.add(value, -1)
+
+    def quantile(self, q):
+        if self.count == 0:
+            return np.nan
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen > rank:
+                return 2 * self.gamma ** index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.bins) / (self.gamma + 1)
+
+
+class ScreenTimeRollup:
+    """
+    Per device/app screen-time accumulators fed one batch of new rows at a time.
+    Every ingest only touches the device/apps and days in the batch: all-time totals and a
+    QuantileSketch of daily usage, the daily totals of the last max(windows) days (from which
+    each affected rolling window is re-summed) and per-app daily totals across devices over
+    the same days for the notebook's charts. The cost of an ingest grows with the batch, not
+    the history. Rows for days older than the retained ones still count in the totals and
+    days, but not in the windows, percentiles or charts.
+    """
+
+    def __init__(self, windows=WINDOWS):
+        self.windows = tuple(sorted(windows))
+        self.keys = {} # (device, app) -> accumulator dict
+        self.app_days = {} # (app, day) -> metric totals across devices, last max(windows) days only
+        self.last_day = None
+        self.rows = 0
+        self.late_rows = 0
+
+    def ingest(self, frame):
+        """Adds a batch of rows with the CSV's columns (Date, Usage, Notifications, Times opened, App[, Device])."""
+        if frame.empty:
+            return
+        days = pd.to_datetime(frame['Date'], format=DATE_FORMAT).to_numpy().astype('datetime64[D]').astype(np.int64)
+        batch = pd.DataFrame({'device': frame[DEVICE_COLUMN].astype(str) if DEVICE_COLUMN in frame else '',
+                              'app': frame['App'].astype(str), 'day': days,
+                              **{metric: frame[metric].to_numpy(dtype=float) for metric in METRICS}})
+        self.rows += len(batch)
+        # Charts keep the days retained before the latest day seen; older per-app days are dropped
+        previous_last_day = self.last_day
+        self.last_day = int(days.max()) if self.last_day is None else max(self.last_day, int(days.max()))
+        oldest = self.last_day - self.windows[-1] + 1
+        if self.last_day != previous_last_day:
+            for key in [key for key in self.app_days if key[1] < oldest]:
+                del self.app_days[key]
+        for (app, day), totals in batch[batch['day'] >= oldest].groupby(['app', 'day'], sort=False)[METRICS].sum().iterrows():
+            self.app_days[app, day] = self.app_days.get((app, day), 0) + totals.to_numpy()
+
+        groups = batch.groupby(['device', 'app', 'day'], sort=True)
+        per_day = groups[METRICS].sum()
+        per_day['rows'] = groups.size()
+        affected = {}
+        for (device, app, day), *totals, rows in per_day.itertuples(name=None):
+            acc = self.keys.get((device, app)) or self.keys.setdefault((device, app), self._new_accumulator())
+            self._add_day(acc, day, totals, rows)
+            affected[device, app] = acc
+        for acc in affected.values():
+            self._resum_windows(acc)
+
+    def _new_accumulator(self):
+        # Plain floats and tuples rather than small arrays: faster to update one at a time and to pickle
+        return {'totals': [0.0] * len(METRICS), 'days': 0, 'first_day': None, 'last_day': None,
+                'seen': 0, 'seen_from': None, # bitset of every day with rows: bit i is day seen_from + i
+                'daily': {}, # day -> metric totals tuple, last max(windows) days only
+                'sketch': QuantileSketch(),
+                'windows': {w: {'totals': (0.0,) * len(METRICS), 'days': 0, 'usage': ()} for w in self.windows}}
+
+    def _add_day(self, acc, day, totals, rows=1):
+        acc['totals'] = [total + value for total, value in zip(acc['totals'], totals)]
+        acc['days'] += self._mark_seen(acc, day)
+        acc['first_day'] = day if acc['first_day'] is None else min(acc['first_day'], day)
+        retained_from = (acc['last_day'] if acc['last_day'] is not None else day) - self.windows[-1] + 1
+        if day < retained_from:
+            self.late_rows += rows
+            return
+        previous = acc['daily'].get(day)
+        if previous is not None:
+            acc['sketch'].remove(previous[0]) # the day's usage changes: replace it in the sketch
+            totals = [total + value for total, value in zip(previous, totals)]
+        acc['daily'][day] = tuple(totals)
+        acc['sketch'].add(totals[0])
+        if acc['last_day'] is None or day > acc['last_day']:
+            acc['last_day'] = day
+            oldest = day - self.windows[-1] + 1
+            for old in [d for d in acc['daily'] if d < oldest]:
+                del acc['daily'][old]
+
+    @staticmethod
+    def _mark_seen(acc, day):
+        """Adds day to the accumulator's set of days with rows; 1 if it is a new day, else 0."""
+        if acc['seen_from'] is None or day < acc['seen_from']:
+            shift = acc['seen_from'] - day if acc['seen_from'] is not None else 0
+            acc['seen'], acc['seen_from'] = acc['seen'] << shift, day
+        bit = 1 << (day - acc['seen_from'])
+        if acc['seen'] & bit:
+            return 0
+        acc['seen'] |= bit
+        return 1
+
+    def _resum_windows(self, acc):
+        for w, window in acc['windows'].items():
+            inside = [totals for day, totals in acc['daily'].items() if day > acc['last_day'] - w]
+            window['totals'] = tuple(map(sum, zip(*inside))) if inside else (0.0,) * len(METRICS)
+            window['days'] = len(inside)
+            window['usage'] = tuple(totals[0] for totals in inside)
+
+    def summary(self):
+        """One row per device/app: all-time totals, means and usage percentiles, then the same per rolling window."""
+        records = []
+        for (device, app), acc in self.keys.items():
+            usage, notifications, opens = acc['totals']
+            record = {'device': device, 'app': app, 'first_day': acc['first_day'], 'last_day': acc['last_day'],
+                      'days': acc['days'], 'usage': usage, 'notifications': notifications, 'times_opened': opens,
+                      'usage_per_day': usage / acc['days'], 'usage_per_open': usage / opens if opens else np.nan,
+                      'usage_p50': acc['sketch'].quantile(0.5), 'usage_p90': acc['sketch'].quantile(0.9)}
+            for w, window in acc['windows'].items():
+                usage, notifications, opens = window['totals']
+                record.update({f'usage_{w}d': usage, f'notifications_{w}d': notifications, f'times_opened_{w}d': opens,
+                               f'usage_per_day_{w}d': usage / window['days'] if window['days'] else np.nan,
+                               f'usage_per_open_{w}d': usage / opens if opens else np.nan,
+                               f'usage_p50_{w}d': np.median(window['usage']) if len(window['usage']) else np.nan})
+            records.append(record)
+        summary = pd.DataFrame(records)
+        for column in ('first_day', 'last_day'):
+            if column in summary:
+                summary[column] = summary[column].astype('datetime64[D]')
+        return summary
+
+    def daily_frame(self):
+        """Per-app daily totals across devices, with the CSV's column names so the notebook's charts take it as is."""
+        if not self.app_days:
+            return pd.DataFrame(columns=['Date', *METRICS, 'App'])
+        (apps, days), totals = zip(*self.app_days), np.array(list(self.app_days.values()))
+        frame = pd.DataFrame({'Date': np.array(days, dtype='datetime64[D]'), **dict(zip(METRICS, totals.T)), 'App': apps})
+        return frame.sort_values(['Date', 'App'], ignore_index=True)
+
+    def charts(self):
+        """The notebook's Plotly figures (usage, notifications and opens per day by app; notifications vs usage)."""
+        import plotly.express as px
+        daily = self.daily_frame()
+        figures = [px.bar(data_frame=daily, x="Date", y=metric, color="App", title=metric) for metric in METRICS]
+        figures.append(px.scatter(data_frame=daily, x="Notifications", y="Usage", size="Notifications", trendline="ols",
+                                  title="Relationship Between Number of Notifications and usage"))
+        return figures
+
+    def save(self, path=STATE_PATH):
+        temporary = f"{path}.tmp"
+        with open(temporary, 'wb') as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, path)
+
+    @staticmethod
+    def load(path=STATE_PATH, windows=WINDOWS):
+        """The saved rollup at path, or a new empty one."""
+        if not os.path.exists(path):
+            return ScreenTimeRollup(windows)
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add new screen-time rows to the rolling per-app summaries.")
+    parser.add_argument("csv", nargs="*", default=["Screentime Details.csv"], help="Files of new rows")
+    parser.add_argument("--state", default=STATE_PATH, help="Rollup file, updated in place")
+    parser.add_argument("--windows", nargs="+", type=int, default=list(WINDOWS),
+                        help="Rolling windows in days (only used when the state file is created)")
+    parser.add_argument("--summary", help="Write the per device/app summary to this CSV file")
+    args = parser.parse_args()
+
+    rollup = ScreenTimeRollup.load(args.state, args.windows)
+    for path in args.csv:
+        start = time.perf_counter()
+        rows = pd.read_csv(path)
+        rollup.ingest(rows)
+        print(f"{path}: {len(rows)} rows in {time.perf_counter() - start:.3f}s")
+    rollup.save(args.state)
+    summary = rollup.summary()
+    print(f"{len(summary)} device/apps, {rollup.rows} rows ingested ({rollup.late_rows} outside the windows)")
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        numeric = summary.select_dtypes(include='number').columns
+        print(summary.head(20).round({column: 2 for column in numeric}).to_string(index=False))
+    if args.summary:
+        summary.to_csv(args.summary, index=False)
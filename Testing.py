@@ -1,12 +1,18 @@
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import linear_kernel
+from Book_Similarity import BACKENDS, catalogue_hash, load_or_fit_model
+
+
+# --- Cached model: fitted once per catalogue, reused across reruns and restarts ---
+@st.cache_resource(max_entries=4)
+def get_recommender(content_hash, backend, _titles, _descriptions):
+    # Keyed by content_hash only; the underscored arguments are not hashed by Streamlit
+    _, recommender = load_or_fit_model(_titles, _descriptions, k=10, backend=backend, key=content_hash)
+    return recommender
 
 
 # --- Function to perform all the data processing and similarity tasks ---
-def analyze_book_data(data):
+def analyze_book_data(data, backend="exact"):
     # Keep only relevant columns, handle errors
     required_cols = {"book_title", "book_desc", "book_rating_count"}
     if not required_cols.issubset(data.columns):
@@ -31,6 +37,7 @@ def analyze_book_data(data):
     values = top_5["book_rating_count"]
     colors = ['gold', 'lightgreen']
 
+    import plotly.graph_objects as go # imported on first chart, not on every page load
     fig = go.Figure(data=[go.Pie(labels=labels, values=values)])
     fig.update_layout(title_text="Top 5 Rated Books")
     fig.update_traces(hoverinfo='label+percent', textinfo='percent', textfont_size=15,
@@ -39,12 +46,10 @@ def analyze_book_data(data):
 
     # TF-IDF and Similarity Calculation
     st.subheader("Book Similarity Analysis")
-    feature = data["book_desc"].tolist()
-    tfidf = TfidfVectorizer(input="content", stop_words="english")
-    tfidf_matrix = tfidf.fit_transform(feature)
-    similarity = linear_kernel(tfidf_matrix, tfidf_matrix)
+    content_hash = catalogue_hash(data["book_title"], data["book_desc"], k=10, backend=backend)
+    recommender = get_recommender(content_hash, backend, data["book_title"].tolist(), data["book_desc"].tolist()) # cached per catalogue and backend
 
-    return data, similarity
+    return data, recommender
 
 
 # --- Streamlit App ---
@@ -85,18 +90,18 @@ st.subheader("Sample Data")
 st.write(data.head())
 
 
-analysis_results = analyze_book_data(data)
+# Exact search for interactive catalogues, approximate (ANN) search for very large ones
+backend = st.sidebar.selectbox("Similarity backend:", list(BACKENDS), format_func=BACKENDS.get)
+
+analysis_results = analyze_book_data(data, backend)
 
 if analysis_results:
-    data, similarity = analysis_results
+    data, recommender = analysis_results
 
     # Interactive similarity finder
     selected_book = st.selectbox("Select a book to find similar ones:", data["book_title"])
     if selected_book:
-        book_index = data[data["book_title"] == selected_book].index[0]
-        sim_scores = list(enumerate(similarity[book_index]))
-        sim_scores = sorted(sim_scores, key=lambda x: x[1], reverse=True)
-        top_similar_books = [data.iloc[i[0]]["book_title"] for i in sim_scores[1:6]]
+        top_similar_books = recommender.recommend(selected_book, n=5)
 
         st.write(f"Books similar to '{selected_book}':")
         for book in top_similar_books:
@@ -1,40 +1,187 @@
+import argparse
+import hashlib
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+from pyarrow import feather
 import matplotlib.pyplot as plt
 import seaborn as sns
 from collections import Counter
 
 # --- 1. Generate a Mock Dataset ---
-def generate_mock_data(num_records=10000):
-    """Generates a mock dataset of Ubisoft player data."""
-    np.random.seed(42) # for reproducibility
-
-    countries = ['USA', 'Canada', 'Germany', 'UK', 'France', 'Brazil', 'Russia', 'China', 'Japan', 'Australia']
-    genders = ['Male', 'Female', 'Non-Binary', 'Prefer not to say']
-    # Common Ubisoft franchises/games (simplified)
-    games = [
-        'Assassin\'s Creed Valhalla', 'Far Cry 6', 'Rainbow Six Siege',
-        'Watch Dogs: Legion', 'The Division 2', 'Ghost Recon Breakpoint',
-        'Immortals Fenyx Rising', 'Riders Republic', 'Skull and Bones' # (hypothetical future play)
-    ]
-    genres = {
-        'Assassin\'s Creed Valhalla': 'Action RPG',
-        'Far Cry 6': 'FPS',
-        'Rainbow Six Siege': 'Tactical FPS',
-        'Watch Dogs: Legion': 'Action-Adventure',
-        'The Division 2': 'Action RPG',
-        'Ghost Recon Breakpoint': 'Tactical Shooter',
-        'Immortals Fenyx Rising': 'Action-Adventure',
-        'Riders Republic': 'Sports',
-        'Skull and Bones': 'Action-Adventure'
+COUNTRIES = ['USA', 'Canada', 'Germany', 'UK', 'France', 'Brazil', 'Russia', 'China', 'Japan', 'Australia']
+COUNTRY_P = [0.25, 0.10, 0.12, 0.10, 0.08, 0.08, 0.07, 0.08, 0.06, 0.06]
+GENDERS = ['Male', 'Female', 'Non-Binary', 'Prefer not to say']
+GENDER_P = [0.65, 0.30, 0.03, 0.02]
+# Common Ubisoft franchises/games (simplified)
+GAMES = [
+    'Assassin\'s Creed Valhalla', 'Far Cry 6', 'Rainbow Six Siege',
+    'Watch Dogs: Legion', 'The Division 2', 'Ghost Recon Breakpoint',
+    'Immortals Fenyx Rising', 'Riders Republic', 'Skull and Bones' # (hypothetical future play)
+]
+GENRES = {
+    'Assassin\'s Creed Valhalla': 'Action RPG',
+    'Far Cry 6': 'FPS',
+    'Rainbow Six Siege': 'Tactical FPS',
+    'Watch Dogs: Legion': 'Action-Adventure',
+    'The Division 2': 'Action RPG',
+    'Ghost Recon Breakpoint': 'Tactical Shooter',
+    'Immortals Fenyx Rising': 'Action-Adventure',
+    'Riders Republic': 'Sports',
+    'Skull and Bones': 'Action-Adventure'
+}
+# Hours played tiers as (games, low, high) - some games inherently get more hours
+HOUR_TIERS = [
+    (['Assassin\'s Creed Valhalla', 'The Division 2', 'Rainbow Six Siege'], 50, 500), # RPGs/Live service
+    (['Far Cry 6', 'Watch Dogs: Legion'], 20, 200),
+]
+DEFAULT_HOURS = (10, 150)
+
+# Compact column types for player tables: categoricals for the string columns and
+# the narrowest integer type that holds each numeric column.
+PLAYER_SCHEMA = {
+    'PlayerID': 'uint32',
+    'Age': 'uint8',
+    'Gender': pd.CategoricalDtype(GENDERS),
+    'Country': pd.CategoricalDtype(COUNTRIES),
+    'GamePlayed': pd.CategoricalDtype(GAMES),
+    'HoursPlayed': 'uint16',
+    'PreferredGenre': pd.CategoricalDtype(sorted(set(GENRES.values()))),
+}
+
+def apply_player_schema(df, declared_categories=True):
+    """
+    Casts a player table to PLAYER_SCHEMA.
+    With declared_categories=False the categories are inferred from the data (for real CSVs
+    whose countries/games differ from the mock lists). Integer columns holding missing values
+    use the matching nullable type; values outside the target range raise a ValueError.
+    """
+    dtypes = {}
+    for column, dtype in PLAYER_SCHEMA.items():
+        if column not in df.columns:
+            continue
+        if isinstance(dtype, pd.CategoricalDtype):
+            dtypes[column] = dtype if declared_categories else 'category'
+            continue
+        values = df[column]
+        info = np.iinfo(dtype)
+        if values.notna().any() and (values.min() < info.min or values.max() > info.max):
+            raise ValueError(f"Column '{column}' has values outside the {dtype} range [{info.min}, {info.max}].")
+        dtypes[column] = dtype.upper().replace('INT', 'Int') if values.isna().any() else dtype
+    return df.astype(dtypes)
+
+def generate_mock_data(num_records=10000, vectorized=True, seed=42, compact=True):
+    """
+    Generates a mock dataset of Ubisoft player data.
+    With vectorized=False the original per-row generator is used (kept for comparison),
+    and with compact=False the result is not cast to PLAYER_SCHEMA.
+    """
+    if not vectorized:
+        df = _generate_mock_data_loop(num_records, seed)
+    else:
+        df = _generate_block(np.random.default_rng(seed), 1, num_records)
+    return apply_player_schema(df) if compact else df
+
+def iter_mock_data_chunks(num_records, chunk_size=1_000_000, seed=42, compact=True):
+    """
+    Yields the mock dataset as DataFrames of at most chunk_size rows.
+    Each chunk is seeded from (seed, chunk index), so any chunk can be regenerated on its own.
+    """
+    for chunk_index, start in enumerate(range(0, num_records, chunk_size)):
+        rng = np.random.default_rng([seed, chunk_index])
+        chunk = _generate_block(rng, start + 1, min(chunk_size, num_records - start))
+        yield apply_player_schema(chunk) if compact else chunk
+
+def load_player_csv(path, **read_csv_kwargs):
+    """Loads a real player CSV straight into the compact schema."""
+    header = pd.read_csv(path, nrows=0, **read_csv_kwargs).columns
+    string_columns = {column: 'category' for column, dtype in PLAYER_SCHEMA.items()
+                      if isinstance(dtype, pd.CategoricalDtype) and column in header}
+    df = pd.read_csv(path, dtype=string_columns, **read_csv_kwargs)
+    return apply_player_schema(df, declared_categories=False)
+
+def schema_report(num_records=1_000_000, seed=42):
+    """
+    Compares memory use and analysis throughput of the compact schema against the
+    object-string / int64 layout the player table used to have.
+    """
+    compact_df = generate_mock_data(num_records, seed=seed)
+    object_df = compact_df.astype({column: object if isinstance(dtype, pd.CategoricalDtype) else 'int64'
+                                   for column, dtype in PLAYER_SCHEMA.items()})
+    operations = {
+        'value_counts(Country)': lambda df: df['Country'].value_counts(),
+        'value_counts(Gender)': lambda df: df['Gender'].value_counts(),
+        'groupby(GamePlayed).HoursPlayed.sum': lambda df: df.groupby('GamePlayed', observed=True)['HoursPlayed'].sum(),
+        'Age.mean': lambda df: df['Age'].mean(),
+        'build_player_cube': build_player_cube,
     }
+    rows = [{'metric': 'memory (MB)',
+             'object': object_df.memory_usage(deep=True).sum() / 1e6,
+             'compact': compact_df.memory_usage(deep=True).sum() / 1e6}]
+    for name, operation in operations.items():
+        row = {'metric': f'{name} (ms)'}
+        for label, df in (('object', object_df), ('compact', compact_df)):
+            start = time.perf_counter()
+            operation(df)
+            row[label] = (time.perf_counter() - start) * 1000
+        rows.append(row)
+    report = pd.DataFrame(rows).set_index('metric')
+    report['ratio'] = report['object'] / report['compact']
+    print(f"\n--- Schema Report ({num_records} rows) ---")
+    print(report.round(2))
+    return report
+
+def write_mock_data(path, num_records, chunk_size=1_000_000, seed=42):
+    """Streams the chunked mock dataset to a CSV file without holding it all in memory."""
+    for chunk_index, chunk in enumerate(iter_mock_data_chunks(num_records, chunk_size, seed)):
+        chunk.to_csv(path, mode='w' if chunk_index == 0 else 'a', header=chunk_index == 0, index=False)
+    return path
+
+def _generate_block(rng, first_id, num_records):
+    """Generates num_records rows with one batched draw per column (and per hours tier)."""
+    game_codes = rng.integers(0, len(GAMES), num_records)
+
+    # Hours played: one batched draw per tier instead of one call per record
+    game_low = np.full(len(GAMES), DEFAULT_HOURS[0])
+    game_high = np.full(len(GAMES), DEFAULT_HOURS[1])
+    for tier_games, low, high in HOUR_TIERS:
+        tier_codes = [GAMES.index(game) for game in tier_games]
+        game_low[tier_codes], game_high[tier_codes] = low, high
+    hours = np.empty(num_records, dtype=np.int64)
+    for low, high in sorted(set(zip(game_low, game_high))):
+        mask = (game_low[game_codes] == low) & (game_high[game_codes] == high)
+        hours[mask] = rng.integers(low, high, mask.sum())
+
+    # Genre is looked up through the game codes rather than per-row dict access
+    genre_names = sorted(set(GENRES.values()))
+    genre_of_game = np.array([genre_names.index(GENRES[game]) for game in GAMES])
+
+    return pd.DataFrame({
+        'PlayerID': np.arange(first_id, first_id + num_records),
+        'Age': rng.integers(13, 65, num_records),
+        'Gender': pd.Categorical.from_codes(rng.choice(len(GENDERS), num_records, p=GENDER_P), GENDERS),
+        'Country': pd.Categorical.from_codes(rng.choice(len(COUNTRIES), num_records, p=COUNTRY_P), COUNTRIES),
+        'GamePlayed': pd.Categorical.from_codes(game_codes, GAMES),
+        'HoursPlayed': hours,
+        'PreferredGenre': pd.Categorical.from_codes(genre_of_game[game_codes], genre_names),
+    })
+
+def _generate_mock_data_loop(num_records, seed):
+    """Original row-by-row generator."""
+    np.random.seed(seed) # for reproducibility
 
     data = {
         'PlayerID': range(1, num_records + 1),
         'Age': np.random.randint(13, 65, num_records),
-        'Gender': np.random.choice(genders, num_records, p=[0.65, 0.30, 0.03, 0.02]),
-        'Country': np.random.choice(countries, num_records, p=[0.25, 0.10, 0.12, 0.10, 0.08, 0.08, 0.07, 0.08, 0.06, 0.06]),
-        'GamePlayed': np.random.choice(games, num_records),
+        'Gender': np.random.choice(GENDERS, num_records, p=GENDER_P),
+        'Country': np.random.choice(COUNTRIES, num_records, p=COUNTRY_P),
+        'GamePlayed': np.random.choice(GAMES, num_records),
     }
 
     # Assign hours played - some games inherently get more hours
@@ -47,138 +194,323 @@ def generate_mock_data(num_records=10000):
         else:
             hours.append(np.random.randint(10, 150))
     data['HoursPlayed'] = hours
-    data['PreferredGenre'] = [genres[game] for game in data['GamePlayed']] # Simplified: genre of game played
+    data['PreferredGenre'] = [GENRES[game] for game in data['GamePlayed']] # Simplified: genre of game played
 
     df = pd.DataFrame(data)
     return df
 
-# --- 2. Analysis Functions ---
+# --- 2. Dataset Store ---
+# Player tables are cached as uncompressed Feather (Arrow IPC) files so that later runs can
+# memory-map them and read only the columns an analysis asks for.
+DATASET_CACHE_DIR = '.ubift_cache'
+STORE_FORMAT_VERSION = 1 # bump when PLAYER_SCHEMA or the generator changes
+
+def get_mock_dataset(num_records, seed=42, columns=None, chunk_size=1_000_000, cache_dir=DATASET_CACHE_DIR):
+    """
+    Returns the mock dataset for (num_records, seed), generating and caching it on first use.
+    Generation streams chunk by chunk into the cache file, so it works for tables larger than RAM.
+    """
+    key = _dataset_key(kind='mock', num_records=num_records, seed=seed, chunk_size=chunk_size)
+    path = _dataset_path(cache_dir, key)
+    if not os.path.exists(path):
+        _write_dataset_chunks(iter_mock_data_chunks(num_records, chunk_size, seed), path)
+    return load_dataset(path, columns=columns)
+
+def get_csv_dataset(csv_path, columns=None, cache_dir=DATASET_CACHE_DIR, **read_csv_kwargs):
+    """Returns a real player CSV through the cache, keyed by the file's content hash."""
+    key = _dataset_key(kind='csv', sha256=_file_sha256(csv_path, cache_dir), read_csv_kwargs=read_csv_kwargs)
+    path = _dataset_path(cache_dir, key)
+    if not os.path.exists(path):
+        _write_dataset_chunks([load_player_csv(csv_path, **read_csv_kwargs)], path)
+    return load_dataset(path, columns=columns)
+
+def load_dataset(path, columns=None):
+    """
+    Memory-maps a cached player table, reading only the requested columns. Each column
+    converts to its own pandas block (no consolidation copy), so the numeric columns stay
+    read-only views of the mapped file; only the categoricals' codes are materialised.
+    """
+    table = feather.read_table(path, columns=columns, memory_map=True)
+    return table.to_pandas(split_blocks=True, self_destruct=True) # the table is not used again
+
+def _write_dataset_chunks(chunks, path):
+    """Writes DataFrame chunks to a Feather file, renaming it into place only once complete."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    writer = None
+    try:
+        for chunk in chunks:
+            batch = pa.RecordBatch.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pa.ipc.new_file(tmp_path, batch.schema)
+            writer.write_batch(batch)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        raise ValueError("Cannot cache an empty dataset.")
+    os.replace(tmp_path, path)
+
+def _dataset_key(**params):
+    params['version'] = STORE_FORMAT_VERSION
+    return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+def _dataset_path(cache_dir, key):
+    return os.path.join(cache_dir, f"players-{key}.feather")
+
+def _file_sha256(path, cache_dir):
+    """
+    Content hash of a file. The digest is remembered per (path, size, mtime) so an unchanged
+    multi-GB CSV is not re-read on every startup.
+    """
+    stat = os.stat(path)
+    fingerprint = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    index_path = os.path.join(cache_dir, 'file_hashes.json')
+    try:
+        with open(index_path) as f:
+            known = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        known = {}
+    if fingerprint not in known:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        known[fingerprint] = digest.hexdigest()
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(index_path, 'w') as f:
+            json.dump(known, f)
+    return known[fingerprint]
+
+# --- 3. Aggregate Engine ---
+class PlayerCube:
+    """
+    Player counts, hour sums and age histograms keyed by (game, country, gender, age bucket).
+    Built in a single pass over the player table; every analysis below reads from it,
+    so per-game drill-downs are just slices of the cube.
+    """
+    DIMS = ['GamePlayed', 'Country', 'Gender']
+    COLUMNS = DIMS + ['Age', 'HoursPlayed', 'PreferredGenre'] # columns read when building the cube
+
+    def __init__(self, df, age_bucket_width=1):
+        self.age_bucket_width = age_bucket_width
+        self.labels = {}
+        codes = []
+        for column in self.DIMS:
+            col_codes, col_labels = _encode_column(df[column])
+            self.labels[column] = col_labels
+            codes.append(col_codes)
 
-def analyze_demographics(df):
+        ages = df['Age'].to_numpy(dtype=float, na_value=np.nan)
+        valid = ~np.isnan(ages)
+        for col_codes in codes:
+            valid &= col_codes >= 0
+        age_min = int(ages[valid].min()) if valid.any() else 0
+        age_codes = np.where(valid, (np.nan_to_num(ages) - age_min) // age_bucket_width, 0).astype(np.int64)
+        self.age_buckets = age_min + np.arange(age_codes.max() + 1 if valid.any() else 0) * age_bucket_width
+
+        shape = tuple(len(self.labels[column]) for column in self.DIMS) + (len(self.age_buckets),)
+        flat = np.ravel_multi_index([c[valid] for c in codes] + [age_codes[valid]], shape)
+        size = int(np.prod(shape))
+        hours = df['HoursPlayed'].to_numpy(dtype=float, na_value=np.nan)[valid]
+        self.counts = np.bincount(flat, minlength=size).reshape(shape)
+        self.hours = np.bincount(flat, weights=np.nan_to_num(hours), minlength=size).reshape(shape)
+        # bincount sums in float64; integer hour columns are summed back to the dtype pandas' sum would give
+        column_dtype = getattr(df['HoursPlayed'].dtype, 'numpy_dtype', df['HoursPlayed'].dtype) # nullable Int -> int
+        if np.issubdtype(column_dtype, np.integer):
+            self.hours = np.rint(self.hours).astype(np.zeros(0, dtype=column_dtype).sum().dtype)
+
+        # Genre is a property of the game, so it is kept as a lookup rather than a cube axis
+        genre_of_game = df[['GamePlayed', 'PreferredGenre']].dropna().drop_duplicates('GamePlayed')
+        self.genres = dict(zip(genre_of_game['GamePlayed'], genre_of_game['PreferredGenre']))
+
+    def _slice(self, cells, game=None):
+        """Restricts a cube array to one game (or all games)."""
+        if game is None:
+            return cells.sum(axis=0)
+        return cells[list(self.labels['GamePlayed']).index(game)]
+
+    def total_players(self, game=None):
+        return int(self._slice(self.counts, game).sum())
+
+    def value_counts(self, column, game=None, normalize=False):
+        """Equivalent of df[column].value_counts() (optionally for one game)."""
+        cells = self._slice(self.counts, game) if column != 'GamePlayed' else self.counts
+        axis = self.DIMS.index(column) - (0 if column == 'GamePlayed' else 1)
+        other_axes = tuple(a for a in range(cells.ndim) if a != axis)
+        counts = pd.Series(cells.sum(axis=other_axes), index=pd.Index(self.labels[column], name=column), name='count')
+        counts = counts[counts > 0].sort_values(ascending=False, kind='stable')
+        if normalize:
+            counts = (counts / counts.sum()).rename('proportion')
+        return counts
+
+    def hours_by_game(self):
+        """Equivalent of df.groupby('GamePlayed')['HoursPlayed'].sum()."""
+        return pd.Series(self.hours.sum(axis=(1, 2, 3)), index=pd.Index(self.labels['GamePlayed'], name='GamePlayed'), name='HoursPlayed')
+
+    def age_histogram(self, game=None):
+        """Number of players per age bucket (indexed by the bucket's lowest age)."""
+        cells = self._slice(self.counts, game)
+        return pd.Series(cells.sum(axis=(0, 1)), index=pd.Index(self.age_buckets, name='Age'), name='count')
+
+    def mean_age(self, game=None):
+        hist = self.age_histogram(game)
+        midpoints = hist.index.to_numpy() + (self.age_bucket_width - 1) / 2
+        return float((midpoints * hist.to_numpy()).sum() / hist.sum()) if hist.sum() else float('nan')
+
+    def median_age(self, game=None):
+        """Median age; exact when the bucket width is 1."""
+        hist = self.age_histogram(game)
+        total = int(hist.sum())
+        if total == 0:
+            return float('nan')
+        cumulative = np.cumsum(hist.to_numpy())
+        midpoints = hist.index.to_numpy() + (self.age_bucket_width - 1) / 2
+        lower = midpoints[np.searchsorted(cumulative, (total - 1) // 2, side='right')]
+        upper = midpoints[np.searchsorted(cumulative, total // 2, side='right')]
+        return (lower + upper) / 2
+
+    def genre_of(self, game):
+        return self.genres.get(game)
+
+def build_player_cube(df, age_bucket_width=1):
+    """Builds the aggregate cube used by the analysis functions."""
+    return PlayerCube(df, age_bucket_width=age_bucket_width)
+
+def _encode_column(series):
+    """Returns (codes, labels) for a column, reusing categorical codes when available."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), list(series.cat.categories)
+    codes, labels = pd.factorize(series)
+    return codes, list(labels)
+
+def _as_cube(data):
+    """Lets the analysis functions take either a player DataFrame or a prebuilt cube."""
+    return data if isinstance(data, PlayerCube) else build_player_cube(data)
+
+# --- 4. Analysis Functions ---
+# Each analysis prints its summary and describes its charts as figure specs (plain dicts of
+# chart data and labels). Passing figures=None shows them inline as before; passing a list
+# collects the specs instead so render_report can draw them headless and in parallel.
+
+def analyze_demographics(data, figures=None):
     """Analyzes and visualizes player demographics (age, gender)."""
+    cube = _as_cube(data)
     print("\n--- Player Demographics ---")
 
     # Age Analysis
-    print(f"Average Player Age: {df['Age'].mean():.2f} years")
-    print(f"Median Player Age: {df['Age'].median()} years")
-    plt.figure(figsize=(10, 6))
-    sns.histplot(df['Age'], bins=20, kde=True)
-    plt.title('Player Age Distribution')
-    plt.xlabel('Age')
-    plt.ylabel('Number of Players')
-    plt.grid(axis='y', alpha=0.75)
-    plt.show()
+    age_hist = cube.age_histogram()
+    print(f"Average Player Age: {cube.mean_age():.2f} years")
+    print(f"Median Player Age: {cube.median_age()} years")
+    _emit_figure({
+        'name': 'age_distribution', 'figsize': (10, 6),
+        'panels': [{'kind': 'hist', 'x': age_hist.index.tolist(), 'weights': age_hist.tolist(), 'bins': 20,
+                    'title': 'Player Age Distribution', 'xlabel': 'Age', 'ylabel': 'Number of Players', 'grid': 'y'}],
+    }, figures)
 
     # Gender Analysis
-    gender_counts = df['Gender'].value_counts(normalize=True) * 100
+    gender_counts = cube.value_counts('Gender', normalize=True) * 100
     print("\nGender Distribution:")
     print(gender_counts)
-    plt.figure(figsize=(8, 8))
-    gender_counts.plot(kind='pie', autopct='%1.1f%%', startangle=90, wedgeprops=dict(width=0.3))
-    plt.title('Player Gender Distribution')
-    plt.ylabel('') # Hide the default 'Gender' ylabel from pie chart
-    plt.show()
+    _emit_figure({
+        'name': 'gender_distribution', 'figsize': (8, 8), 'tight_layout': False,
+        'panels': [{'kind': 'pie', 'labels': gender_counts.index.tolist(), 'values': gender_counts.tolist(),
+                    'wedgeprops': dict(width=0.3), 'title': 'Player Gender Distribution'}],
+    }, figures)
 
-def analyze_top_countries(df, top_n=5):
+def analyze_top_countries(data, top_n=5, figures=None):
     """Analyzes and visualizes top countries of players."""
+    cube = _as_cube(data)
     print("\n--- Top Countries ---")
-    country_counts = df['Country'].value_counts()
+    country_counts = cube.value_counts('Country')
     print(f"Top {top_n} countries by player count:")
     print(country_counts.head(top_n))
 
-    plt.figure(figsize=(12, 7))
-    country_counts.head(top_n).plot(kind='bar', color=sns.color_palette("viridis", top_n))
-    plt.title(f'Top {top_n} Countries by Player Count')
-    plt.xlabel('Country')
-    plt.ylabel('Number of Players')
-    plt.xticks(rotation=45, ha='right')
-    plt.tight_layout()
-    plt.grid(axis='y', alpha=0.75)
-    plt.show()
-
-def analyze_most_played_games(df):
+    _emit_figure({
+        'name': 'top_countries', 'figsize': (12, 7),
+        'panels': [{'kind': 'bar', 'labels': country_counts.head(top_n).index.tolist(),
+                    'values': country_counts.head(top_n).tolist(), 'palette': ('viridis', top_n),
+                    'title': f'Top {top_n} Countries by Player Count', 'xlabel': 'Country',
+                    'ylabel': 'Number of Players', 'grid': 'y'}],
+    }, figures)
+
+def analyze_most_played_games(data, figures=None):
     """Analyzes and visualizes most played games by total hours."""
+    cube = _as_cube(data)
     print("\n--- Most Played Games ---")
     # By total hours played
-    game_hours = df.groupby('GamePlayed')['HoursPlayed'].sum().sort_values(ascending=False)
+    game_hours = cube.hours_by_game().sort_values(ascending=False)
     print("Games by Total Hours Played:")
     print(game_hours)
 
-    plt.figure(figsize=(14, 8))
-    game_hours.head(10).plot(kind='barh', color=sns.color_palette("magma", 10))
-    plt.title('Top Games by Total Hours Played')
-    plt.xlabel('Total Hours Played')
-    plt.ylabel('Game Title')
-    plt.gca().invert_yaxis() # To show the top game at the top
-    plt.tight_layout()
-    plt.grid(axis='x', alpha=0.75)
-    plt.show()
+    _emit_figure({
+        'name': 'most_played_games', 'figsize': (14, 8),
+        'panels': [{'kind': 'barh', 'labels': game_hours.head(10).index.tolist(),
+                    'values': game_hours.head(10).tolist(), 'palette': ('magma', 10),
+                    'title': 'Top Games by Total Hours Played', 'xlabel': 'Total Hours Played',
+                    'ylabel': 'Game Title', 'grid': 'x'}],
+    }, figures)
     
     return game_hours.index[0] # Return the most played game title
 
-def analyze_correlation_for_top_game(df, top_game):
+def analyze_correlation_for_top_game(data, top_game, figures=None):
     """
     Tries to find correlations or insights for why the top game is popular.
     This is speculative and based on the available mock data.
     """
+    cube = _as_cube(data)
     print(f"\n--- Analysis for Top Game: {top_game} ---")
 
-    top_game_df = df[df['GamePlayed'] == top_game]
-    
     # 1. Demographics of players of the top game
     print(f"\nDemographics for players of {top_game}:")
-    avg_age_top_game = top_game_df['Age'].mean()
+    avg_age_top_game = cube.mean_age(top_game)
     print(f"  Average Age: {avg_age_top_game:.2f} years")
     
-    gender_dist_top_game = top_game_df['Gender'].value_counts(normalize=True) * 100
+    gender_dist_top_game = cube.value_counts('Gender', game=top_game, normalize=True) * 100
     print("  Gender Distribution:")
     print(gender_dist_top_game)
 
-    plt.figure(figsize=(12, 5))
-    plt.subplot(1, 2, 1)
-    sns.histplot(top_game_df['Age'], bins=15, kde=True, color='skyblue')
-    plt.title(f'Age Distribution for {top_game} Players')
-    plt.xlabel('Age')
-    plt.ylabel('Number of Players')
-    
-    plt.subplot(1, 2, 2)
-    gender_dist_top_game.plot(kind='pie', autopct='%1.1f%%', startangle=90)
-    plt.title(f'Gender Distribution for {top_game} Players')
-    plt.ylabel('')
-    plt.tight_layout()
-    plt.show()
+    top_game_age_hist = cube.age_histogram(top_game)
+    _emit_figure({
+        'name': 'top_game_demographics', 'figsize': (12, 5),
+        'panels': [{'kind': 'hist', 'x': top_game_age_hist.index.tolist(), 'weights': top_game_age_hist.tolist(),
+                    'bins': 15, 'color': 'skyblue', 'title': f'Age Distribution for {top_game} Players',
+                    'xlabel': 'Age', 'ylabel': 'Number of Players'},
+                   {'kind': 'pie', 'labels': gender_dist_top_game.index.tolist(), 'values': gender_dist_top_game.tolist(),
+                    'title': f'Gender Distribution for {top_game} Players'}],
+    }, figures)
 
     # 2. Top countries for the top game
-    top_game_country_counts = top_game_df['Country'].value_counts().head(5)
+    top_game_country_counts = cube.value_counts('Country', game=top_game).head(5)
     print(f"\nTop 5 countries for {top_game}:")
     print(top_game_country_counts)
     
-    plt.figure(figsize=(10, 6))
-    top_game_country_counts.plot(kind='bar', color=sns.color_palette("coolwarm", 5))
-    plt.title(f'Top 5 Countries for {top_game} Players')
-    plt.xlabel('Country')
-    plt.ylabel('Number of Players')
-    plt.xticks(rotation=45, ha='right')
-    plt.tight_layout()
-    plt.show()
+    _emit_figure({
+        'name': 'top_game_countries', 'figsize': (10, 6),
+        'panels': [{'kind': 'bar', 'labels': top_game_country_counts.index.tolist(),
+                    'values': top_game_country_counts.tolist(), 'palette': ('coolwarm', 5),
+                    'title': f'Top 5 Countries for {top_game} Players', 'xlabel': 'Country',
+                    'ylabel': 'Number of Players'}],
+    }, figures)
 
     # 3. Genre correlation (simplified)
-    top_game_genre = top_game_df['PreferredGenre'].iloc[0] # All entries will have same genre for this game
+    top_game_genre = cube.genre_of(top_game) # All entries will have same genre for this game
     print(f"\n{top_game} is a(n) {top_game_genre} game.")
 
     # Speculative reasons based on mock data patterns:
     print("\nPotential (Speculative) Reasons for Popularity:")
     if top_game_genre in ['Action RPG', 'Tactical FPS', 'Tactical Shooter']:
         print(f"- The engaging nature of {top_game_genre}s often leads to higher playtime per player.")
-    if avg_age_top_game < df['Age'].mean() - 2: # Significantly younger
+    overall_avg_age = cube.mean_age()
+    if avg_age_top_game < overall_avg_age - 2: # Significantly younger
         print(f"- Its appeal to a younger demographic (avg age {avg_age_top_game:.2f}) might contribute to its high engagement.")
-    elif avg_age_top_game > df['Age'].mean() + 2: # Significantly older
+    elif avg_age_top_game > overall_avg_age + 2: # Significantly older
         print(f"- It might resonate more with a mature audience (avg age {avg_age_top_game:.2f}), who may have more dedicated playtime.")
     else:
         print(f"- It has a broad appeal across various age groups (avg age {avg_age_top_game:.2f} is close to overall average).")
 
     # Compare gender distribution to overall
-    overall_male_percentage = (df['Gender'].value_counts(normalize=True) * 100).get('Male', 0)
+    overall_male_percentage = (cube.value_counts('Gender', normalize=True) * 100).get('Male', 0)
     top_game_male_percentage = gender_dist_top_game.get('Male', 0)
     if abs(top_game_male_percentage - overall_male_percentage) > 5: # More than 5% difference
         if top_game_male_percentage > overall_male_percentage:
@@ -189,22 +521,125 @@ def analyze_correlation_for_top_game(df, top_game):
     print("\nDisclaimer: These are correlations based on mock data. Real-world analysis would require much richer datasets including gameplay telemetry, player surveys, social sentiment, marketing data, etc.")
 
 
+# --- 5. Figure Rendering and Reports ---
+
+def _emit_figure(spec, figures):
+    """Shows a figure spec inline, or collects it when building a report."""
+    if figures is None:
+        draw_figure(spec)
+        plt.show()
+    else:
+        figures.append(spec)
+
+def draw_figure(spec):
+    """Draws a figure spec with matplotlib/seaborn and returns the figure."""
+    fig = plt.figure(figsize=spec['figsize'])
+    for position, panel in enumerate(spec['panels'], start=1):
+        ax = fig.add_subplot(1, len(spec['panels']), position)
+        if panel['kind'] == 'hist':
+            sns.histplot(x=panel['x'], weights=panel['weights'], bins=panel['bins'], kde=True,
+                         color=panel.get('color'), ax=ax)
+        elif panel['kind'] == 'pie':
+            pd.Series(panel['values'], index=panel['labels']).plot(
+                kind='pie', autopct='%1.1f%%', startangle=90, wedgeprops=panel.get('wedgeprops'), ax=ax)
+        else: # 'bar' / 'barh'
+            palette_name, palette_size = panel['palette']
+            pd.Series(panel['values'], index=panel['labels']).plot(
+                kind=panel['kind'], color=sns.color_palette(palette_name, palette_size), ax=ax)
+            if panel['kind'] == 'bar':
+                plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
+            else:
+                ax.invert_yaxis() # To show the top entry at the top
+        ax.set_title(panel['title'])
+        ax.set_xlabel(panel.get('xlabel', ''))
+        ax.set_ylabel(panel.get('ylabel', '')) # Pie charts hide the default column ylabel
+        if panel.get('grid'):
+            ax.grid(axis=panel['grid'], alpha=0.75)
+    if spec.get('tight_layout', True):
+        fig.tight_layout()
+    return fig
+
+def _render_figure_file(spec, out_dir, formats):
+    """Process-pool worker: renders one figure spec to files on the Agg backend."""
+    plt.switch_backend('Agg')
+    sns.set_style("whitegrid")
+    plt.rcParams['figure.facecolor'] = 'w' # white background for saved figures
+
+    start = time.perf_counter()
+    fig = draw_figure(spec)
+    timing = {'name': spec['name'], 'draw_ms': (time.perf_counter() - start) * 1000}
+    files = []
+    for fmt in formats:
+        start = time.perf_counter()
+        path = os.path.join(out_dir, f"{spec['name']}.{fmt}")
+        fig.savefig(path, format=fmt)
+        timing[f'{fmt}_ms'] = (time.perf_counter() - start) * 1000
+        files.append(os.path.basename(path))
+    plt.close(fig)
+    timing['total_ms'] = sum(value for key, value in timing.items() if key.endswith('_ms'))
+    return files, timing
+
+def render_report(specs, out_dir, text='', formats=('png',), max_workers=None):
+    """
+    Renders figure specs concurrently in a process pool and writes report.md to out_dir,
+    with the analysis text, the figures and a per-figure render timing table.
+    Returns the path of the report.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(_render_figure_file, spec, out_dir, formats) for spec in specs]
+        results = [future.result() for future in futures]
+
+    timings = pd.DataFrame([timing for _, timing in results]).set_index('name')
+    lines = ['# Ubisoft Player Analysis Report', '', '```', text.strip(), '```', '']
+    for files, timing in results:
+        lines += [f"## {timing['name'].replace('_', ' ').title()}", '', f"![{timing['name']}]({files[0]})", '']
+    timings = timings.sort_values('total_ms', ascending=False).round(1)
+    lines += ['## Render Timings (ms)', '', '| figure | ' + ' | '.join(timings.columns) + ' |',
+              '|---' * (len(timings.columns) + 1) + '|']
+    lines += [f"| {name} | " + ' | '.join(str(value) for value in row) + ' |' for name, row in timings.iterrows()]
+    lines.append('')
+
+    report_path = os.path.join(out_dir, 'report.md')
+    with open(report_path, 'w') as f:
+        f.write('\n'.join(lines))
+    return report_path
+
+def run_report(data, out_dir, top_n=5, formats=('png',), max_workers=None):
+    """Runs every analysis headless and renders the collected figures into a report."""
+    cube = _as_cube(data)
+    figures = []
+    text = io.StringIO()
+    with redirect_stdout(text):
+        analyze_demographics(cube, figures=figures)
+        analyze_top_countries(cube, top_n=top_n, figures=figures)
+        most_played_game = analyze_most_played_games(cube, figures=figures)
+        if most_played_game:
+            analyze_correlation_for_top_game(cube, most_played_game, figures=figures)
+    return render_report(figures, out_dir, text=text.getvalue(), formats=formats, max_workers=max_workers)
+
+
 # --- Main Execution ---
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ubisoft player analysis")
+    parser.add_argument('--report', metavar='OUT_DIR', help="render figures headless into OUT_DIR/report.md instead of showing them")
+    parser.add_argument('--formats', nargs='+', default=['png'], choices=['png', 'svg'], help="figure formats for --report")
+    args = parser.parse_args()
+
     # Generate or load data
-    # To use a real CSV:
+    # To use a real CSV (cached after the first run, keyed by file content):
     # try:
-    #     player_df = pd.read_csv('your_ubisoft_dataset.csv')
+    #     player_df = get_csv_dataset('your_ubisoft_dataset.csv', columns=PlayerCube.COLUMNS)
     # except FileNotFoundError:
     #     print("Dataset file not found. Generating mock data instead.")
-    #     player_df = generate_mock_data(num_records=20000) # Generate more for better visuals
+    #     player_df = get_mock_dataset(num_records=20000) # Generate more for better visuals
     # except Exception as e:
     #     print(f"Error loading dataset: {e}. Generating mock data instead.")
-    #     player_df = generate_mock_data(num_records=20000)
+    #     player_df = get_mock_dataset(num_records=20000)
         
-    print("Generating mock data for demonstration...")
-    player_df = generate_mock_data(num_records=50000) # Using 50k records for better distributions
-    print(f"\nGenerated {len(player_df)} mock player records.")
+    print("Loading mock data for demonstration (generated on the first run)...")
+    player_df = get_mock_dataset(num_records=50000) # Using 50k records for better distributions
+    print(f"\nLoaded {len(player_df)} mock player records.")
     print("First 5 records:")
     print(player_df.head())
 
@@ -212,12 +647,20 @@ if __name__ == "__main__":
     sns.set_style("whitegrid")
     plt.rcParams['figure.facecolor'] = 'w' # white background for saved figures
 
-    # Perform analysis
-    analyze_demographics(player_df)
-    analyze_top_countries(player_df, top_n=5)
-    most_played_game = analyze_most_played_games(player_df)
-    
-    if most_played_game:
-        analyze_correlation_for_top_game(player_df, most_played_game)
+    # Aggregate once; every analysis reads from the cube
+    player_cube = build_player_cube(player_df)
+
+    if args.report:
+        # Headless: figures are rendered to files in parallel and collected into one report
+        report_path = run_report(player_cube, args.report, top_n=5, formats=args.formats)
+        print(f"\nReport written to {report_path}")
+    else:
+        # Perform analysis
+        analyze_demographics(player_cube)
+        analyze_top_countries(player_cube, top_n=5)
+        most_played_game = analyze_most_played_games(player_cube)
+        
+        if most_played_game:
+            analyze_correlation_for_top_game(player_cube, most_played_game)
 
     print("\nAnalysis Complete.")
\ No newline at end of file
@@ -0,0 +1,217 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+# Fitted results are cached under FIT_CACHE_DIR, keyed by a hash of the series and the model settings
+FIT_CACHE_DIR = '.traffic_fit_cache'
+# Parameters of each series' latest fit, used as starting values when it is refitted on new data
+WARM_START_FILE = 'warm_starts.json'
+# SARIMAX (p, d, q) and seasonal (P, D, Q); the seasonal period comes from each series' frequency
+ORDER = (1, 1, 1)
+SEASONAL_ORDER = (0, 1, 1)
+# Forecast horizon in months (turned into periods per series: 24 monthly, 8 quarterly, 2 annual)
+HORIZON_MONTHS = 24
+# Fewest observations a series needs to be fitted
+MIN_OBSERVATIONS = 8
+MODES = ['forecast', 'decompose']
+
+
+def load_series(path='Website.csv'):
+    """
+    Reads the CSV once and splits it by Series_reference into {reference: (months, values)}:
+    months is datetime64[M] (Period 2022.1 is October 2022) and values float64, trimmed of
+    leading and trailing missing values.
+    """
+    data = pd.read_csv(path, usecols=['Series_reference', 'Period', 'Data_value'],
+                       dtype={'Series_reference': str, 'Period': np.float64, 'Data_value': np.float64})
+    year = np.floor(data['Period'].to_numpy())
+    month = np.rint((data['Period'].to_numpy() - year) * 100)
+    months = ((year - 1970) * 12 + month - 1).astype(np.int64).astype('datetime64[M]')
+    values = data['Data_value'].to_numpy()
+    series = {}
+    for reference, rows in data.groupby('Series_reference', sort=False).indices.items():
+        rows = rows[np.argsort(months[rows], kind='stable')]
+        present = np.flatnonzero(~np.isnan(values[rows]))
+        if len(present):
+            rows = rows[present[0]:present[-1] + 1]
+            series[reference] = (months[rows], values[rows])
+    return series
+
+
+def step_months(months):
+    """Months between consecutive observations (1 monthly, 3 quarterly, 12 annual)."""
+    return int(np.median(np.diff(months.astype(np.int64)))) if len(months) > 1 else 12
+
+
+def series_key(reference, months, values, settings):
+    """Content hash of one series and the settings it is fitted with."""
+    digest = hashlib.sha256(reference.encode())
+    digest.update(memoryview(np.ascontiguousarray(months.astype(np.int64))).cast('B'))
+    digest.update(memoryview(np.ascontiguousarray(values)).cast('B'))
+    digest.update(json.dumps(settings, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def fit_series(task):
+    """
+    Fits (or decomposes) one series, or reads the result from the cache. task is
+    (reference, months, values, settings, start_params, cache_dir). Returns a dict with the
+    fit summary and the output rows as arrays.
+    """
+    reference, months, values, settings, start_params, cache_dir = task
+    key = series_key(reference, months, values, settings)
+    path = os.path.join(cache_dir, f"{key}.npz") if cache_dir else None
+    if path and os.path.exists(path):
+        with np.load(path, allow_pickle=False) as cached:
+            result = {name: cached[name] for name in cached.files}
+        result['summary'] = json.loads(str(result['summary']))
+        result['summary']['cached'] = True
+        return result
+
+    start = time.perf_counter()
+    step = step_months(months)
+    period = 12 // step if step in (1, 3) else 1
+    summary = {'series_reference': reference, 'step_months': step, 'observations': int(np.sum(~np.isnan(values))),
+               'status': 'ok', 'cached': False}
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore') # statsmodels warns about starting values and convergence on many short series
+        if summary['observations'] < MIN_OBSERVATIONS:
+            summary['status'] = 'too short'
+            columns = {}
+        elif settings['mode'] == 'decompose':
+            columns = _decompose(months, values, period, summary)
+        else:
+            columns = _forecast(months, values, period, step, settings, start_params, summary)
+    summary['seconds'] = time.perf_counter() - start
+
+    result = {name: np.asarray(column) for name, column in columns.items()}
+    if path:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Written under a temporary name first so a concurrent reader never sees half a file
+        temporary = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(temporary, summary=json.dumps(summary), **result)
+        os.replace(temporary, path)
+    result['summary'] = summary
+    return result
+
+
+def _forecast(months, values, period, step, settings, start_params, summary):
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+    seasonal = tuple(settings['seasonal_order'])
+    # Seasonal differencing needs a few full seasons
+    seasonal_order = (*seasonal, period) if period > 1 and len(values) >= 3 * period + 2 else (0, 0, 0, 0)
+    model = SARIMAX(values, order=tuple(settings['order']), seasonal_order=seasonal_order, concentrate_scale=True)
+    fitted = None
+    if start_params is not None and len(start_params) == len(model.start_params):
+        fitted = model.fit(start_params=start_params, disp=False)
+        summary['warm_start'] = True
+    if fitted is None or not fitted.mle_retvals['converged']:
+        fitted = model.fit(disp=False)
+        summary['warm_start'] = False
+    summary.update({'seasonal_period': seasonal_order[3], 'aic': float(fitted.aic),
+                    'converged': bool(fitted.mle_retvals['converged']),
+                    'iterations': int(fitted.mle_retvals['iterations'])})
+
+    horizon = max(1, settings['horizon_months'] // step)
+    prediction = fitted.get_forecast(horizon)
+    interval = prediction.conf_int(alpha=settings['alpha'])
+    return {'period': months[-1] + step * np.arange(1, horizon + 1), 'step': np.arange(1, horizon + 1),
+            'forecast': prediction.predicted_mean, 'lower': interval[:, 0], 'upper': interval[:, 1],
+            'params': fitted.params}
+
+
+def _decompose(months, values, period, summary):
+    from statsmodels.tsa.seasonal import seasonal_decompose
+    if period == 1 or len(values) < 2 * period:
+        summary['status'] = 'no seasonality'
+        return {}
+    observed = pd.Series(values).interpolate().to_numpy() # seasonal_decompose needs a gapless series
+    parts = seasonal_decompose(observed, period=period, model='additive')
+    summary['seasonal_period'] = period
+    return {'period': months, 'observed': values, 'trend': parts.trend, 'seasonal': parts.seasonal, 'resid': parts.resid}
+
+
+def run(series, mode='forecast', order=ORDER, seasonal_order=SEASONAL_ORDER, horizon_months=HORIZON_MONTHS,
+        alpha=0.05, jobs=None, cache_dir=FIT_CACHE_DIR):
+    """
+    Fits every series of load_series on a process pool and returns (output, summary):
+    output is one long DataFrame for all series (forecasts with interval bounds, or the
+    decomposition components), summary one row per series. Unchanged series are read from
+    the cache; changed ones start from their previous parameters.
+    """
+    settings = {'mode': mode, 'order': list(order), 'seasonal_order': list(seasonal_order),
+                'horizon_months': horizon_months, 'alpha': alpha}
+    warm_starts = _read_warm_starts(cache_dir)
+    tasks = [(reference, months, values, settings, warm_starts.get(reference), cache_dir)
+             for reference, (months, values) in series.items()]
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1:
+        results = [fit_series(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(fit_series, tasks, chunksize=max(1, math.ceil(len(tasks) / (4 * jobs)))))
+
+    frames, summaries = [], []
+    for result in results:
+        params = result.pop('params', None)
+        summary = result.pop('summary')
+        summaries.append(summary)
+        if params is not None and cache_dir:
+            warm_starts[summary['series_reference']] = params.tolist()
+        if result:
+            frame = pd.DataFrame(result)
+            frame.insert(0, 'series_reference', summary['series_reference'])
+            frames.append(frame)
+    if mode == 'forecast':
+        _write_warm_starts(cache_dir, warm_starts)
+    output = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    if 'period' in output:
+        output['period'] = output['period'].astype('datetime64[s]')
+    return output, pd.DataFrame(summaries)
+
+
+def _read_warm_starts(cache_dir):
+    path = os.path.join(cache_dir, WARM_START_FILE) if cache_dir else None
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return {reference: np.array(params) for reference, params in json.load(f).items()}
+
+
+def _write_warm_starts(cache_dir, warm_starts):
+    if not cache_dir:
+        return
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(os.path.join(cache_dir, WARM_START_FILE), 'w') as f:
+        json.dump({reference: np.asarray(params).tolist() for reference, params in warm_starts.items()}, f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Forecast or decompose every Series_reference of Website.csv.")
+    parser.add_argument("csv", nargs="?", default="Website.csv")
+    parser.add_argument("--mode", choices=MODES, default="forecast")
+    parser.add_argument("--horizon-months", type=int, default=HORIZON_MONTHS)
+    parser.add_argument("--alpha", type=float, default=0.05, help="Forecast interval level is 1 - alpha")
+    parser.add_argument("--jobs", type=int, help="Worker processes (default: all cores)")
+    parser.add_argument("--no-cache", action="store_true", help="Refit everything and leave the cache untouched")
+    parser.add_argument("--out", help="Parquet output path (default: <mode>s.parquet)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    series = load_series(args.csv)
+    output, summary = run(series, args.mode, horizon_months=args.horizon_months, alpha=args.alpha, jobs=args.jobs,
+                          cache_dir=None if args.no_cache else FIT_CACHE_DIR)
+    out = args.out or f"{args.mode}s.parquet"
+    output.to_parquet(out, index=False)
+    print(f"{len(series)} series in {time.perf_counter() - start:.1f}s "
+          f"({int(summary['cached'].sum())} cached, {int((summary['status'] != 'ok').sum())} skipped); "
+          f"wrote {len(output)} rows to {out}")
+    if 'converged' in summary:
+        print(f"{int((summary['converged'] == False).sum())} fits did not converge")